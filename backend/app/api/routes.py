@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
-from typing import List
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import logging
 
 from app.core.logging import setup_logging
-from app.schemas.prediction import SMSPredictionRequest, SMSPredictionResponse, BatchSMSPredictionRequest, BatchSMSPredictionResponse, PredictionHistoryResponse
+from app.schemas.prediction import SMSPredictionRequest, SMSPredictionResponse, BatchSMSPredictionRequest, BatchSMSPredictionResponse, PredictionHistoryResponse, HourlyPredictionStatsResponse
 from app.services.model_service import model_service
 from app.services.db_service import db_service
-from app.core.database import get_db
+from app.services.prediction_writer import prediction_writer
+from app.core.database import get_async_db, get_db
+from app.core.execution import execution_pool, InferenceOverloadedError
 
 # Import SlowAPI for rate limiting (avoiding circular import)
 from slowapi import Limiter
@@ -42,8 +45,9 @@ async def predict_spam(request: Request, sms_request: SMSPredictionRequest, db:
             
         sanitized_text = validator.sanitize_sms_text(sms_request.sms_text)
         
-        # Get prediction from model
-        result = model_service.predict(sanitized_text)
+        # Get prediction from model off the event loop so concurrent
+        # requests can be grouped by the inference scheduler
+        result = await model_service.predict_async(sanitized_text)
         
         # Convert result to match schema (prediction -> is_spam)
         # Our model returns "spam" or "not_spam" strings
@@ -59,20 +63,27 @@ async def predict_spam(request: Request, sms_request: SMSPredictionRequest, db:
             "sms_text": sanitized_text,
             "prediction": is_spam,
             "confidence": confidence,
-            "timestamp": datetime.now()
+            "timestamp": datetime.now(),
+            "model_version": model_service.model_version
         }
         
-        # Save to database
-        try:
-            db_service.save_prediction(db, prediction_data)
-        except Exception as db_error:
-            logger.warning(f"Failed to save prediction to database: {str(db_error)}")
+        # Hand the row to the write-behind buffer so the response does not wait on a commit
+        if prediction_writer.running:
+            prediction_writer.submit(prediction_data)
+        else:
+            try:
+                await execution_pool.run_io(db_service.save_prediction, db, prediction_data)
+            except Exception as db_error:
+                logger.warning(f"Failed to save prediction to database: {str(db_error)}")
         
         return SMSPredictionResponse(**prediction_data)
         
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except InferenceOverloadedError as e:
+        logger.warning(f"Rejecting prediction: {str(e)}")
+        raise HTTPException(status_code=503, detail="Prediction service is overloaded, please retry")
     except Exception as e:
         logger.error(f"Error during prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
@@ -95,10 +106,11 @@ async def batch_predict_spam(request: Request, batch_request: BatchSMSPrediction
         from uuid import uuid4
         from datetime import datetime
         
-        for sms_text in sanitized_texts:
-            # Get prediction from model
-            result = model_service.predict(sms_text)
-            
+        # Get predictions for the whole batch in chunked forward passes
+        results = await model_service.predict_many_async(sanitized_texts)
+        
+        predictions_data = []
+        for sms_text, result in zip(sanitized_texts, results):
             # Convert result to match schema
             is_spam = result["prediction"] == "spam"
             confidence = result["confidence"]
@@ -109,21 +121,28 @@ async def batch_predict_spam(request: Request, batch_request: BatchSMSPrediction
                 "sms_text": sms_text,
                 "prediction": is_spam,
                 "confidence": confidence,
-                "timestamp": datetime.now()
+                "timestamp": datetime.now(),
+                "model_version": model_service.model_version
             }
-            
-            # Save to database
+            predictions_data.append(prediction_data)
+            predictions.append(SMSPredictionResponse(**prediction_data))
+        
+        # Save the whole batch in one transaction (via the write-behind buffer when it is running)
+        if prediction_writer.running:
+            prediction_writer.submit_many(predictions_data)
+        else:
             try:
-                db_service.save_prediction(db, prediction_data)
+                await execution_pool.run_io(db_service.save_predictions, db, predictions_data)
             except Exception as db_error:
-                logger.warning(f"Failed to save prediction to database: {str(db_error)}")
-            
-            predictions.append(SMSPredictionResponse(**prediction_data))
+                logger.warning(f"Failed to save batch predictions to database: {str(db_error)}")
         
         return BatchSMSPredictionResponse(predictions=predictions)
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except InferenceOverloadedError as e:
+        logger.warning(f"Rejecting batch prediction: {str(e)}")
+        raise HTTPException(status_code=503, detail="Prediction service is overloaded, please retry")
     except Exception as e:
         logger.error(f"Error during batch prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
@@ -211,15 +230,37 @@ async def get_batch_job_status(job_id: str):
 
 @router.get("/history", response_model=PredictionHistoryResponse)
 @limiter.limit("20/minute")  # Rate limit: 20 requests per minute
-async def get_prediction_history(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get prediction history"""
+async def get_prediction_history(request: Request, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                                 db: Session = Depends(get_db), async_db: Optional[AsyncSession] = Depends(get_async_db)):
+    """Get prediction history, newest first; follow next_cursor for older pages"""
     try:
-        predictions, total = db_service.get_predictions(db, skip, limit)
-        return PredictionHistoryResponse(predictions=predictions, total=total)
+        if async_db is not None:
+            predictions, total, next_cursor = await db_service.get_predictions_async(async_db, skip, limit, cursor)
+        else:
+            predictions, total, next_cursor = await execution_pool.run_io(db_service.get_predictions, db, skip, limit, cursor)
+        return PredictionHistoryResponse(predictions=predictions, total=total, next_cursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving prediction history: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve prediction history: {str(e)}")
 
+@router.get("/stats/hourly", response_model=HourlyPredictionStatsResponse)
+@limiter.limit("20/minute")  # Rate limit: 20 requests per minute
+async def get_hourly_stats(request: Request, hours: int = 24, db: Session = Depends(get_db),
+                           async_db: Optional[AsyncSession] = Depends(get_async_db)):
+    """Hourly spam/ham counts and confidence stats from the rollup table (no raw-row scan)"""
+    try:
+        hours = min(max(hours, 1), 24 * 366)
+        if async_db is not None:
+            stats = await db_service.get_hourly_stats_async(async_db, hours)
+        else:
+            stats = await execution_pool.run_io(db_service.get_hourly_stats, db, hours)
+        return HourlyPredictionStatsResponse(stats=stats)
+    except Exception as e:
+        logger.error(f"Error retrieving hourly stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve hourly stats: {str(e)}")
+
 @router.get("/")
 async def read_root():
     return {
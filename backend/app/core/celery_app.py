@@ -2,7 +2,7 @@ from celery import Celery
 from app.core.celery_config import *
 
 # Create Celery app instance
-celery_app = Celery("spam_detection")
+celery_app = Celery("spam_detection", include=["app.tasks.batch_processing", "app.tasks.maintenance"])
 
 # Load configuration
 celery_app.config_from_object("app.core.celery_config")
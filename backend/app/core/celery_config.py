@@ -15,4 +15,12 @@ CELERY_ENABLE_UTC = True
 
 # Worker settings
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
-CELERY_TASK_ALWAYS_EAGER = False  # Set to True for testing without a broker
\ No newline at end of file
+CELERY_TASK_ALWAYS_EAGER = False  # Set to True for testing without a broker
+
+# Periodic tasks (run with `celery -A app.core.celery_app beat`)
+CELERYBEAT_SCHEDULE = {
+    'maintain-prediction-partitions': {
+        'task': 'app.tasks.maintenance.maintain_prediction_partitions',
+        'schedule': float(settings.PREDICTION_MAINTENANCE_INTERVAL_S),
+    },
+}
\ No newline at end of file
@@ -8,6 +8,45 @@ class Settings(BaseSettings):
     
     # Model settings
     MODEL_NAME: str = "deathVader-afk/tinyllama-sms-spam"
+    MODEL_VERSION: Optional[str] = None  # Pins the cache namespace / Prediction.model_version; default is a fingerprint of the loaded artifact
+    INFERENCE_MODE: str = "merged"  # "peft" keeps the LoRA wrapper, "merged" folds adapters into the base weights
+    MERGE_PARITY_ATOL: float = 5e-2
+    MERGED_MODEL_PATH: Optional[str] = None  # Exported merged artifact; loaded via mmap when present
+    INFERENCE_QUANTIZATION: str = "none"  # "none" or "dynamic_int8" (CPU only)
+    INFERENCE_BACKEND: str = "torch"  # "torch" or "onnx" (ONNX Runtime CPU provider)
+    ONNX_MODEL_PATH: Optional[str] = None  # Directory with model.onnx and tokenizer
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 lets ONNX Runtime pick
+    
+    # Cascade settings: a hashed n-gram first stage answers confident messages, the rest escalate
+    CASCADE_ENABLED: bool = False
+    CASCADE_MODEL_PATH: Optional[str] = None  # .npz written by scripts/train_cascade_model.py
+    CASCADE_SPAM_THRESHOLD: float = 0.98  # First-stage spam probability at or above this is answered as spam
+    CASCADE_HAM_THRESHOLD: float = 0.02  # ... at or below this is answered as not_spam
+    
+    # Inference batching settings
+    INFERENCE_BATCHING_ENABLED: bool = True
+    INFERENCE_MAX_BATCH_SIZE: int = 16
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+    INFERENCE_BATCH_CHUNK_SIZE: int = 32
+    INFERENCE_MAX_TOKENS: int = 256  # SMS texts rarely exceed ~200 tokens; see scripts/benchmark_token_cap.py
+    INFERENCE_POOLED_HEAD: bool = True  # Apply the score head only at the last non-pad token
+    INFERENCE_LENGTH_BUCKETING: bool = True
+    INFERENCE_MAX_BATCH_TOKENS: int = 8192
+    
+    # Execution pool settings
+    INFERENCE_THREAD_POOL_SIZE: int = 4
+    IO_THREAD_POOL_SIZE: int = 16
+    INFERENCE_MAX_PENDING: int = 256  # Requests beyond this get a 503
+    
+    # Inference worker pool settings (python -m app.workers.inference_pool)
+    INFERENCE_POOL_ENABLED: bool = False
+    INFERENCE_POOL_ADDRESS: str = "/tmp/spam_inference.sock"  # Unix socket path or host:port
+    INFERENCE_POOL_AUTHKEY: Optional[str] = None  # Shared secret (16+ chars); required for non-loopback TCP addresses
+    INFERENCE_POOL_AUTHKEY_FILE: str = "/tmp/spam_inference.key"  # Per-start key written by the pool when no AUTHKEY is set
+    INFERENCE_POOL_SIZE: int = 2
+    INFERENCE_WORKER_TORCH_THREADS: int = 2
+    INFERENCE_POOL_TIMEOUT_S: float = 60.0
+    INFERENCE_POOL_STARTUP_TIMEOUT_S: float = 600.0  # Time allowed for every worker to load the model
     
     # Database settings
     POSTGRES_SERVER: str = "localhost"
@@ -15,11 +54,73 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "spam_detection"
     DATABASE_URL: Optional[str] = None
+    HISTORY_COUNT_TTL_S: float = 60.0  # How long the /history total is reused
+    HISTORY_COUNT_EXACT: bool = False  # COUNT(*) instead of the planner's row estimate
+    
+    # Database connection pool
+    DB_POOL_SIZE: int = 10  # Persistent connections per process (and per engine)
+    DB_MAX_OVERFLOW: int = 10  # Extra connections opened under burst, closed when returned
+    DB_POOL_TIMEOUT_S: float = 5.0  # Wait for a free connection before failing the request
+    DB_POOL_RECYCLE_S: int = 1800  # Replace connections older than this; -1 disables
+    DB_POOL_PRE_PING: bool = True  # Check connections on checkout and reconnect transparently
+    DB_ASYNC_ENABLED: bool = False  # asyncpg engine for API reads (history, stats)
+    
+    # Write-behind buffer for API prediction logging
+    PREDICTION_WRITE_BUFFER_ENABLED: bool = True
+    PREDICTION_WRITE_BUFFER_MAX_SIZE: int = 10000
+    PREDICTION_WRITE_BATCH_SIZE: int = 500
+    PREDICTION_WRITE_FLUSH_INTERVAL_S: float = 1.0
+    PREDICTION_WRITE_OVERFLOW_POLICY: str = "drop_oldest"  # "drop_oldest" or "drop_newest" when the buffer is full
+    
+    # Predictions table partitioning, retention and rollups
+    PREDICTION_PARTITION_DAYS_AHEAD: int = 7  # Daily partitions created in advance
+    PREDICTION_RETENTION_DAYS: int = 90  # Raw predictions older than this are dropped by partition; 0 keeps everything
+    PREDICTION_RETENTION_DELETE_BATCH: int = 5000  # Rows per DELETE when expiring rows that landed in the DEFAULT partition
+    PREDICTION_ROLLUP_LOOKBACK_HOURS: int = 3  # Recent hours re-aggregated on each maintenance run
+    PREDICTION_MAINTENANCE_INTERVAL_S: int = 900  # Celery beat schedule for partition maintenance
     
     # Redis settings
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 32  # Per pool (text and bytes)
+    REDIS_POOL_TIMEOUT_S: float = 1.0  # Wait for a free pooled connection
+    REDIS_CONNECT_TIMEOUT_S: float = 1.0
+    REDIS_SOCKET_TIMEOUT_S: float = 1.0
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive connection/timeout errors before failing fast
+    REDIS_RECONNECT_BACKOFF_S: float = 0.5
+    REDIS_RECONNECT_MAX_BACKOFF_S: float = 30.0
+    CACHE_TTL_S: int = 3600
+    CACHE_RECORD_FORMAT: str = "binary"  # "binary" (packed records) or "json" (legacy, for rollback)
+    CACHE_RECORD_FLOAT16: bool = False  # Store probabilities as float16 instead of float32
+    
+    # In-process cache tier in front of Redis
+    LOCAL_CACHE_ENABLED: bool = True
+    LOCAL_CACHE_MAX_ENTRIES: int = 10000
+    LOCAL_CACHE_TTL_S: float = 300.0
+    
+    # Cache key canonicalisation: "off", "shadow" (measure agreement only) or "on"
+    CACHE_KEY_CANONICALIZATION: str = "off"
+    CACHE_KEY_UNICODE_NORMALIZE: bool = True
+    CACHE_KEY_CASEFOLD: bool = True
+    CACHE_KEY_MASK_URLS: bool = True
+    CACHE_KEY_MASK_NUMBERS: bool = True
+    
+    # Single-flight: concurrent predictions of the same text share one forward pass
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_REDIS_LOCK: bool = False  # Also coalesce across processes via a Redis lock per cache key
+    SINGLE_FLIGHT_LOCK_TTL_MS: int = 10000
+    SINGLE_FLIGHT_WAIT_TIMEOUT_S: float = 10.0  # Give up waiting on another process and run the forward
+    SINGLE_FLIGHT_POLL_MS: float = 20.0
+    
+    # Near-duplicate index (MinHash LSH); hits return the stored verdict without a forward pass
+    NEAR_DUPLICATE_ENABLED: bool = False
+    NEAR_DUPLICATE_THRESHOLD: float = 0.85
+    NEAR_DUPLICATE_NUM_PERM: int = 64
+    NEAR_DUPLICATE_BANDS: int = 16
+    NEAR_DUPLICATE_MAX_ENTRIES: int = 50000
+    NEAR_DUPLICATE_TTL_S: float = 3600.0
+    NEAR_DUPLICATE_VERIFY_RATE: float = 0.01
     
     # Celery settings
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
@@ -1,18 +1,93 @@
+import time
+import logging
+from prometheus_client import Counter, Gauge, Histogram
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 # Use absolute import
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting for a database connection from the pool',
+    ['engine'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter('db_pool_checkout_timeouts_total', 'Pool checkouts that gave up after DB_POOL_TIMEOUT_S', ['engine'])
+DB_POOL_CONNECTIONS = Gauge('db_pool_connections', 'Connections in the database pools', ['engine', 'state'])
+DB_POOL_SATURATION = Gauge('db_pool_saturation', 'Checked-out connections as a fraction of pool_size + max_overflow', ['engine'])
+
+class _TimedCheckoutMixin:
+    """Records how long each checkout waited for a free connection"""
+
+    metrics_name = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(engine=self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(engine=self.metrics_name).observe(time.perf_counter() - started)
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics_name = "sync"
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+def _export_pool_metrics(name: str, pool):
+    capacity = pool.size() + max(settings.DB_MAX_OVERFLOW, 0)
+    DB_POOL_CONNECTIONS.labels(engine=name, state="checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels(engine=name, state="idle").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels(engine=name, state="overflow").set_function(lambda: max(pool.overflow(), 0))
+    DB_POOL_CONNECTIONS.labels(engine=name, state="max").set(capacity)
+    DB_POOL_SATURATION.labels(engine=name).set_function(lambda: pool.checkedout() / capacity if capacity else 0.0)
+
+def _pool_kwargs() -> dict:
+    return dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_S,
+        # Recycle before server/proxy idle timeouts close connections under us
+        pool_recycle=settings.DB_POOL_RECYCLE_S,
+        # Cheap liveness check on checkout so a restarted database costs one retry, not a failed request
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    )
+
 # Create database engine
 if settings.DATABASE_URL:
     SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 else:
     SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}/{settings.POSTGRES_DB}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, **_pool_kwargs())
+_export_pool_metrics("sync", engine.pool)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional asyncpg engine for the FastAPI read path (DB_ASYNC_ENABLED)
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC_ENABLED:
+    try:
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+        async_url = make_url(SQLALCHEMY_DATABASE_URL).set(drivername="postgresql+asyncpg")
+        async_engine = create_async_engine(async_url, poolclass=InstrumentedAsyncQueuePool, **_pool_kwargs())
+        _export_pool_metrics("async", async_engine.pool)
+        AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        logger.info("Async database engine (asyncpg) enabled")
+    except ImportError as e:
+        logger.warning(f"DB_ASYNC_ENABLED is set but the async driver is unavailable ({str(e)}); using the sync engine")
+
 Base = declarative_base()
 
 def get_db():
@@ -20,4 +95,24 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Yields an AsyncSession, or None when the async engine is disabled (callers fall back to get_db)"""
+    if AsyncSessionLocal is None:
+        yield None
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def init_db():
+    """Create tables, indexes added since and today's partitions (blocking; run off the event loop)"""
+    from app.models.prediction import Prediction
+    from app.services.partition_service import partition_service
+
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced since separately
+    for index in Prediction.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    # Make sure today's partition exists before the first insert; Celery beat keeps creating the rest
+    partition_service.ensure_partitions(engine)
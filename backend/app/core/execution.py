@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+INFERENCE_INFLIGHT = Gauge('inference_pool_inflight', 'Inference calls admitted and not yet finished')
+INFERENCE_REJECTED = Counter('inference_pool_rejected_total', 'Inference calls rejected because the pool was saturated')
+IO_INFLIGHT = Gauge('io_pool_inflight', 'Blocking I/O calls running or queued in the I/O pool')
+
+
+class InferenceOverloadedError(Exception):
+    """Raised when more inference calls are pending than INFERENCE_MAX_PENDING allows"""
+
+
+class ExecutionPool:
+    """Runs blocking work off the asyncio event loop
+
+    Inference (torch forwards) and blocking I/O (SQLAlchemy commits, Redis
+    calls) get separate bounded thread pools so a slow forward pass cannot
+    starve database writes, and neither blocks the loop serving /health and
+    /metrics. Inference admission is capped at ``max_pending``; callers beyond
+    that get InferenceOverloadedError instead of queueing without bound.
+    """
+
+    def __init__(self, inference_workers: int, io_workers: int, max_pending: int):
+        self.inference_workers = inference_workers
+        self.io_workers = io_workers
+        self.max_pending = max_pending
+        self._inference_executor = None
+        self._io_executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def inference_executor(self) -> ThreadPoolExecutor:
+        if self._inference_executor is None:
+            self._inference_executor = ThreadPoolExecutor(max_workers=self.inference_workers, thread_name_prefix="inference")
+        return self._inference_executor
+
+    @property
+    def io_executor(self) -> ThreadPoolExecutor:
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="blocking-io")
+        return self._io_executor
+
+    def admit(self):
+        """Reserve an inference slot, raising if the pool is saturated"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                INFERENCE_REJECTED.inc()
+                raise InferenceOverloadedError(f"Inference queue full ({self.max_pending} pending)")
+            self._pending += 1
+        INFERENCE_INFLIGHT.inc()
+
+    def release(self):
+        """Release a slot reserved by admit()"""
+        with self._lock:
+            self._pending -= 1
+        INFERENCE_INFLIGHT.dec()
+
+    async def run_inference(self, fn: Callable, *args: Any) -> Any:
+        """Run a blocking inference call in the inference pool"""
+        self.admit()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.inference_executor, fn, *args)
+        finally:
+            self.release()
+
+    async def run_io(self, fn: Callable, *args: Any) -> Any:
+        """Run a blocking I/O call (database, cache) in the I/O pool"""
+        IO_INFLIGHT.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.io_executor, fn, *args)
+        finally:
+            IO_INFLIGHT.dec()
+
+    def shutdown(self):
+        """Wait for running work and stop both pools"""
+        for executor in (self._inference_executor, self._io_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._inference_executor = None
+        self._io_executor = None
+        logger.info("Execution pools shut down")
+
+
+# Global execution pool instance
+execution_pool = ExecutionPool(
+    inference_workers=settings.INFERENCE_THREAD_POOL_SIZE,
+    io_workers=settings.IO_THREAD_POOL_SIZE,
+    max_pending=settings.INFERENCE_MAX_PENDING
+)
@@ -1,25 +1,18 @@
 from fastapi import FastAPI
 from prometheus_client import Counter, Histogram, generate_latest
 import time
+import asyncio
 
 # Use absolute imports
 from app.api.routes import router as api_router
 from app.core.config import settings
 from app.core.logging import setup_logging
-from app.core.database import Base, engine
-from app.models.prediction import Prediction
+from app.core.database import init_db
 import logging
 
 # Set up logging
 logger = setup_logging()
 
-# Create database tables
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
-except Exception as e:
-    logger.error(f"Error creating database tables: {str(e)}")
-
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -60,14 +53,45 @@ app.include_router(api_router, prefix="/api/v1")
 async def startup_event():
     """Initialize application on startup"""
     logger.info("Starting up application...")
+    # Create database tables off the event loop (and not at import time, so workers and scripts skip it)
+    try:
+        from app.core.execution import execution_pool
+        await execution_pool.run_io(init_db)
+        logger.info("Database tables created successfully")
+    except Exception as e:
+        logger.error(f"Error creating database tables: {str(e)}")
+    
     try:
         # Initialize model service
         from app.services.model_service import model_service
         model_service.load_model()
         logger.info("Model loaded successfully")
+        model_service.start_scheduler()
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         logger.warning("Application will start without model. Model will be loaded on first request.")
+    
+    if settings.PREDICTION_WRITE_BUFFER_ENABLED:
+        from app.services.prediction_writer import prediction_writer
+        prediction_writer.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release resources on shutdown"""
+    logger.info("Shutting down application...")
+    from app.services.model_service import model_service
+    from app.core.execution import execution_pool
+    from app.services.prediction_writer import prediction_writer
+    model_service.stop_scheduler()
+    # Drain buffered prediction rows before the I/O pool and connections go away, off the event loop
+    await asyncio.to_thread(prediction_writer.stop)
+    execution_pool.shutdown()
+    if model_service.async_redis_client is not None:
+        await model_service.async_redis_client.close()
+    from app.core.database import async_engine, engine
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Float, DateTime, Integer
+from sqlalchemy import Column, String, Boolean, Float, DateTime, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 # Use absolute import
@@ -6,10 +6,31 @@ from app.core.database import Base
 
 class Prediction(Base):
     __tablename__ = "predictions"
+    __table_args__ = (
+        # Supports keyset pagination of /history (newest first)
+        Index("ix_predictions_timestamp_id", "timestamp", "id"),
+        # Daily range partitions are created and dropped by app.services.partition_service
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     sms_text = Column(String, nullable=False)
     prediction = Column(Boolean, nullable=False)
     confidence = Column(Float, nullable=False)
-    timestamp = Column(DateTime, nullable=False)
-    model_version = Column(String, nullable=True, default="1.0.0")
\ No newline at end of file
+    # Part of the primary key because Postgres requires the partition key in every unique constraint
+    timestamp = Column(DateTime, primary_key=True, nullable=False)
+    model_version = Column(String, nullable=True, default="1.0.0")
+
+class PredictionHourlyRollup(Base):
+    """Spam/ham counts and confidence stats per hour and model version, kept after raw partitions are dropped"""
+    __tablename__ = "prediction_hourly_rollups"
+    
+    hour = Column(DateTime, primary_key=True)
+    model_version = Column(String, primary_key=True)
+    total_count = Column(Integer, nullable=False)
+    spam_count = Column(Integer, nullable=False)
+    ham_count = Column(Integer, nullable=False)
+    confidence_sum = Column(Float, nullable=False)
+    confidence_min = Column(Float, nullable=False)
+    confidence_max = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
@@ -22,4 +22,18 @@ class BatchSMSPredictionResponse(BaseModel):
 
 class PredictionHistoryResponse(BaseModel):
     predictions: List[SMSPredictionResponse]
-    total: int
\ No newline at end of file
+    total: int  # Approximate on large tables; refreshed periodically
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next (older) page
+
+class HourlyPredictionStats(BaseModel):
+    hour: datetime
+    model_version: str
+    total_count: int
+    spam_count: int
+    ham_count: int
+    avg_confidence: float
+    min_confidence: float
+    max_confidence: float
+
+class HourlyPredictionStatsResponse(BaseModel):
+    stats: List[HourlyPredictionStats]
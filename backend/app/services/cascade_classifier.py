@@ -0,0 +1,149 @@
+import re
+import zlib
+import logging
+from typing import List, Tuple
+
+import numpy as np
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CASCADE_DECISIONS = Counter(
+    'cascade_decisions_total',
+    'Messages answered by the first-stage classifier or escalated to the fine-tuned model',
+    ['stage']
+)
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_DIGIT = re.compile(r"\d")
+
+
+class HashedNgramClassifier:
+    """Logistic regression over hashed word and character n-grams
+
+    A cheap first stage for the cascade: each message becomes a binary,
+    L2-normalised vector of ``num_features`` hashed buckets (word 1-2 grams and
+    character 3-5 grams), scored by a single dot product.
+    """
+
+    def __init__(self, num_features: int = 1 << 18, word_ngrams: int = 2, char_ngrams: Tuple[int, int] = (3, 5)):
+        self.num_features = num_features
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = tuple(char_ngrams)
+        self.weights = np.zeros(num_features, dtype=np.float32)
+        self.bias = 0.0
+
+    def _features(self, text: str) -> np.ndarray:
+        """Hashed feature indices of one message"""
+        text = _DIGIT.sub("0", text.casefold())
+        tokens = _TOKEN.findall(text)
+        grams = []
+        for n in range(1, self.word_ngrams + 1):
+            grams.extend("w:" + " ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        padded = f" {' '.join(tokens)} "
+        low, high = self.char_ngrams
+        for n in range(low, high + 1):
+            grams.extend("c:" + padded[i:i + n] for i in range(len(padded) - n + 1))
+        indices = {zlib.crc32(gram.encode("utf-8")) % self.num_features for gram in grams}
+        return np.fromiter(indices, dtype=np.int64, count=len(indices))
+
+    def _vectorize(self, texts: List[str]):
+        """Sparse rows as (row ids, feature indices, values), each row L2-normalised"""
+        row_ids, indices, values = [], [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not len(features):
+                continue
+            row_ids.append(np.full(len(features), row, dtype=np.int64))
+            indices.append(features)
+            values.append(np.full(len(features), 1.0 / np.sqrt(len(features)), dtype=np.float32))
+        if not row_ids:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return np.concatenate(row_ids), np.concatenate(indices), np.concatenate(values)
+
+    def _scores(self, rows, count: int) -> np.ndarray:
+        row_ids, indices, values = rows
+        return np.bincount(row_ids, weights=self.weights[indices] * values, minlength=count) + self.bias
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Spam probability for each message"""
+        scores = self._scores(self._vectorize(texts), len(texts))
+        return 1.0 / (1.0 + np.exp(-scores))
+
+    def fit(self, texts: List[str], labels: List[int], epochs: int = 200,
+            learning_rate: float = 0.5, l2: float = 1e-5) -> "HashedNgramClassifier":
+        """Full-batch AdaGrad on the logistic loss (labels: 1 = spam, 0 = ham)"""
+        rows = self._vectorize(texts)
+        row_ids, indices, values = rows
+        targets = np.asarray(labels, dtype=np.float64)
+        count = len(texts)
+        weight_sq = np.zeros(self.num_features, dtype=np.float64)
+        bias_sq = 0.0
+        for epoch in range(epochs):
+            errors = 1.0 / (1.0 + np.exp(-self._scores(rows, count))) - targets
+            grad = np.bincount(indices, weights=errors[row_ids] * values, minlength=self.num_features) / count
+            grad += l2 * self.weights
+            grad_bias = float(errors.mean())
+            weight_sq += grad ** 2
+            bias_sq += grad_bias ** 2
+            self.weights -= (learning_rate * grad / (np.sqrt(weight_sq) + 1e-8)).astype(np.float32)
+            self.bias -= learning_rate * grad_bias / (np.sqrt(bias_sq) + 1e-8)
+            if (epoch + 1) % 50 == 0:
+                probs = np.clip(errors + targets, 1e-7, 1 - 1e-7)
+                loss = -np.mean(targets * np.log(probs) + (1 - targets) * np.log(1 - probs))
+                logger.info(f"Cascade epoch {epoch + 1}/{epochs}: loss {loss:.4f}")
+        return self
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.float64(self.bias),
+            num_features=np.int64(self.num_features),
+            word_ngrams=np.int64(self.word_ngrams),
+            char_ngrams=np.asarray(self.char_ngrams, dtype=np.int64)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        with np.load(path) as data:
+            classifier = cls(
+                num_features=int(data["num_features"]),
+                word_ngrams=int(data["word_ngrams"]),
+                char_ngrams=tuple(int(n) for n in data["char_ngrams"])
+            )
+            classifier.weights = data["weights"].astype(np.float32)
+            classifier.bias = float(data["bias"])
+        return classifier
+
+
+class CascadeRouter:
+    """Decides which messages the first stage answers and which escalate
+
+    Messages whose first-stage spam probability is at least ``spam_threshold``
+    or at most ``ham_threshold`` are answered directly; the rest go to the
+    fine-tuned model.
+    """
+
+    def __init__(self, classifier: HashedNgramClassifier, spam_threshold: float = 0.98, ham_threshold: float = 0.02):
+        if ham_threshold >= spam_threshold:
+            raise ValueError("ham_threshold must be below spam_threshold")
+        self.classifier = classifier
+        self.spam_threshold = spam_threshold
+        self.ham_threshold = ham_threshold
+
+    def route(self, texts: List[str]) -> Tuple[dict, List[int]]:
+        """Return ({index: spam probability} for answered messages, indices to escalate)"""
+        answered, escalate = {}, []
+        for i, spam_prob in enumerate(self.classifier.predict_proba(texts)):
+            if spam_prob >= self.spam_threshold or spam_prob <= self.ham_threshold:
+                answered[i] = float(spam_prob)
+            else:
+                escalate.append(i)
+        if answered:
+            CASCADE_DECISIONS.labels(stage="first").inc(len(answered))
+        if escalate:
+            CASCADE_DECISIONS.labels(stage="escalated").inc(len(escalate))
+        return answered, escalate
@@ -1,15 +1,33 @@
 # Use absolute imports
-from app.models.prediction import Prediction
-from app.core.database import get_db
+from app.models.prediction import Prediction, PredictionHourlyRollup
+from app.core.config import settings
+from sqlalchemy import func, insert, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta
+import base64
 import logging
+import threading
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Planner row estimate for the predictions table; a partitioned parent has no
+# rows of its own, so its partitions' estimates are added up
+ESTIMATE_COUNT = text(
+    "SELECT coalesce("
+    "(SELECT sum(greatest(c.reltuples, 0)) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = to_regclass(:table)), "
+    "(SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)))::bigint"
+)
+
 class DatabaseService:
     def __init__(self):
-        pass
+        # (expires_at, total) for the /history row count
+        self._count_cache = None
+        self._count_lock = threading.Lock()
     
     def save_prediction(self, db: Session, prediction_data: dict):
         """Save a prediction to the database"""
@@ -25,16 +43,159 @@ class DatabaseService:
             logger.error(f"Error saving prediction to database: {str(e)}")
             raise e
     
-    def get_predictions(self, db: Session, skip: int = 0, limit: int = 100):
-        """Retrieve predictions from the database"""
+    def save_predictions(self, db: Session, predictions_data: List[dict]) -> int:
+        """Save a batch of predictions in a single transaction
+
+        Rows go through one executemany INSERT (batched into multi-row VALUES
+        by the driver) and are not read back, so a batch costs one round trip
+        per page instead of an INSERT, COMMIT and SELECT per prediction.
+        """
+        if not predictions_data:
+            return 0
+        try:
+            db.execute(insert(Prediction), predictions_data)
+            db.commit()
+            logger.info(f"Saved {len(predictions_data)} predictions to database")
+            return len(predictions_data)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving {len(predictions_data)} predictions to database: {str(e)}")
+            raise e
+    
+    def get_predictions(self, db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Retrieve predictions newest first, one page at a time
+
+        With ``cursor`` (the ``next_cursor`` of the previous page) the page is
+        found by a keyset seek on (timestamp, id), which costs the same at any
+        depth; ``skip`` is kept for older clients and still scans the skipped
+        rows. Returns (predictions, total, next_cursor), where total is the
+        approximate row count from ``count_predictions``.
+        """
+        try:
+            predictions = db.execute(self._history_statement(skip, limit, cursor)).scalars().all()
+            total = self.count_predictions(db)
+            logger.info(f"Retrieved {len(predictions)} predictions from database")
+            return predictions, total, self._next_cursor(predictions, limit)
+        except Exception as e:
+            logger.error(f"Error retrieving predictions from database: {str(e)}")
+            raise e
+    
+    async def get_predictions_async(self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """get_predictions on an AsyncSession, awaited on the event loop"""
         try:
-            predictions = db.query(Prediction).offset(skip).limit(limit).all()
-            total = db.query(Prediction).count()
+            predictions = (await db.execute(self._history_statement(skip, limit, cursor))).scalars().all()
+            total = await self.count_predictions_async(db)
             logger.info(f"Retrieved {len(predictions)} predictions from database")
-            return predictions, total
+            return predictions, total, self._next_cursor(predictions, limit)
         except Exception as e:
             logger.error(f"Error retrieving predictions from database: {str(e)}")
             raise e
+    
+    def _history_statement(self, skip: int, limit: int, cursor: Optional[str]):
+        statement = select(Prediction).order_by(Prediction.timestamp.desc(), Prediction.id.desc())
+        if cursor:
+            timestamp, prediction_id = self.decode_cursor(cursor)
+            statement = statement.where(tuple_(Prediction.timestamp, Prediction.id) < tuple_(timestamp, prediction_id))
+        elif skip:
+            statement = statement.offset(skip)
+        return statement.limit(limit)
+    
+    def _next_cursor(self, predictions: List[Prediction], limit: int) -> Optional[str]:
+        return self.encode_cursor(predictions[-1]) if predictions and len(predictions) == limit else None
+    
+    @staticmethod
+    def encode_cursor(prediction: Prediction) -> str:
+        """Opaque keyset cursor pointing just past ``prediction``"""
+        raw = f"{prediction.timestamp.isoformat()}|{prediction.id}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+        try:
+            timestamp, prediction_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split("|")
+            return datetime.fromisoformat(timestamp), uuid.UUID(prediction_id)
+        except Exception as e:
+            raise ValueError(f"Invalid history cursor: {cursor}") from e
+    
+    def count_predictions(self, db: Session) -> int:
+        """Row count of the predictions table, refreshed at most every HISTORY_COUNT_TTL_S
+
+        On PostgreSQL the planner's estimate (pg_class.reltuples, kept fresh by
+        autovacuum/ANALYZE) is used so the count is constant-time; an exact
+        COUNT(*) is only run when no estimate exists or HISTORY_COUNT_EXACT is set.
+        """
+        total = self._cached_count()
+        if total is not None:
+            return total
+        if self._use_estimate(db):
+            total = self._usable_estimate(db.execute(ESTIMATE_COUNT, {"table": Prediction.__tablename__}).scalar())
+        if total is None:
+            total = db.execute(select(func.count(Prediction.id))).scalar()
+        return self._remember_count(total)
+    
+    async def count_predictions_async(self, db: AsyncSession) -> int:
+        """count_predictions on an AsyncSession, sharing the same cached total"""
+        total = self._cached_count()
+        if total is not None:
+            return total
+        if self._use_estimate(db):
+            total = self._usable_estimate((await db.execute(ESTIMATE_COUNT, {"table": Prediction.__tablename__})).scalar())
+        if total is None:
+            total = (await db.execute(select(func.count(Prediction.id)))).scalar()
+        return self._remember_count(total)
+    
+    def _cached_count(self) -> Optional[int]:
+        with self._count_lock:
+            if self._count_cache is not None and self._count_cache[0] > time.monotonic():
+                return self._count_cache[1]
+        return None
+    
+    def _remember_count(self, total: int) -> int:
+        with self._count_lock:
+            self._count_cache = (time.monotonic() + settings.HISTORY_COUNT_TTL_S, total)
+        return total
+    
+    @staticmethod
+    def _use_estimate(db) -> bool:
+        return not settings.HISTORY_COUNT_EXACT and db.get_bind().dialect.name == "postgresql"
+    
+    @staticmethod
+    def _usable_estimate(estimate) -> Optional[int]:
+        # -1 (or 0 on older servers) means the table has never been analyzed
+        return int(estimate) if estimate is not None and estimate > 0 else None
+
+    def get_hourly_stats(self, db: Session, hours: int = 24) -> List[dict]:
+        """Hourly spam/ham counts and confidence stats for the last ``hours``, read from the rollup table"""
+        rows = db.execute(self._hourly_statement(hours)).scalars().all()
+        return [self._hourly_row(row) for row in rows]
+    
+    async def get_hourly_stats_async(self, db: AsyncSession, hours: int = 24) -> List[dict]:
+        """get_hourly_stats on an AsyncSession"""
+        rows = (await db.execute(self._hourly_statement(hours))).scalars().all()
+        return [self._hourly_row(row) for row in rows]
+    
+    @staticmethod
+    def _hourly_statement(hours: int):
+        since = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours)
+        return (
+            select(PredictionHourlyRollup)
+            .where(PredictionHourlyRollup.hour >= since)
+            .order_by(PredictionHourlyRollup.hour.desc(), PredictionHourlyRollup.model_version)
+        )
+    
+    @staticmethod
+    def _hourly_row(row: PredictionHourlyRollup) -> dict:
+        return {
+            "hour": row.hour,
+            "model_version": row.model_version,
+            "total_count": row.total_count,
+            "spam_count": row.spam_count,
+            "ham_count": row.ham_count,
+            "avg_confidence": row.confidence_sum / row.total_count if row.total_count else 0.0,
+            "min_confidence": row.confidence_min,
+            "max_confidence": row.confidence_max
+        }
 
 # Global database service instance
 db_service = DatabaseService()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import os
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model.onnx"
+
+
+class TorchBackend:
+    """Runs padded batches through an in-process PyTorch model
+
+    With ``pooled_head`` the decoder runs on its own and the score head is
+    applied only to each row's last real token, which is the only position
+    Llama sequence classification reads, instead of to every position.
+    """
+
+    name = "torch"
+
+    def __init__(self, model, tokenizer, device, pooled_head: bool = False):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.pooled_head = pooled_head
+
+    def predict_proba(self, encoded_chunk: dict) -> List[List[float]]:
+        """Pad a chunk of tokenized inputs and return class probabilities per row"""
+        import torch
+
+        inputs = self.tokenizer.pad(encoded_chunk, padding=True, return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            if self.pooled_head:
+                logits = self._pooled_logits(inputs)
+            else:
+                logits = self.model(**inputs).logits
+            return torch.nn.functional.softmax(logits.float(), dim=-1).tolist()
+
+    def _pooled_logits(self, inputs):
+        """Run the decoder and apply the score head at the last non-pad position only"""
+        import torch
+
+        # PEFT models keep LoRA layers injected in the wrapped model, so its submodules still apply them
+        classifier = self.model.get_base_model() if hasattr(self.model, "get_base_model") else self.model
+        hidden_states = classifier.model(
+            input_ids=inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            use_cache=False
+        ).last_hidden_state
+
+        attention_mask = inputs["attention_mask"]
+        if self.tokenizer.padding_side == "left":
+            last_positions = torch.full((attention_mask.size(0),), attention_mask.size(1) - 1, device=attention_mask.device)
+        else:
+            last_positions = attention_mask.sum(dim=-1) - 1
+        rows = torch.arange(hidden_states.size(0), device=hidden_states.device)
+        return classifier.score(hidden_states[rows, last_positions])
+
+
+class OnnxRuntimeBackend:
+    """Runs padded batches through an exported ONNX model on ONNX Runtime's CPU provider"""
+
+    name = "onnx"
+
+    def __init__(self, model_dir: str, tokenizer, intra_op_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.tokenizer = tokenizer
+
+    def predict_proba(self, encoded_chunk: dict) -> List[List[float]]:
+        """Pad a chunk of tokenized inputs and return class probabilities per row"""
+        import numpy as np
+
+        inputs = self.tokenizer.pad(encoded_chunk, padding=True, return_tensors="np")
+        feed = {name: inputs[name].astype(np.int64) for name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0].astype(np.float32)
+
+        # Numerically stable softmax
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=-1, keepdims=True)).tolist()
+
+
+def export_onnx(model, tokenizer, output_dir: str, opset: int = 17) -> str:
+    """Export a merged sequence classification model to ONNX with dynamic batch and sequence axes
+
+    Weights are written as external data next to ``model.onnx`` since a 1.1B
+    parameter model exceeds the 2GB protobuf limit. The tokenizer and model
+    config are saved alongside so the directory can be served on its own.
+    """
+    import torch
+
+    class _LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask, use_cache=False).logits
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = model.to("cpu").float().eval()
+    # The classifier locates each row's last token via pad_token_id, which is traced into the graph
+    model.config.pad_token_id = tokenizer.pad_token_id
+    sample = tokenizer(["Free entry to win a prize", "See you at lunch"], return_tensors="pt", padding=True)
+    output_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            output_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"}
+            },
+            opset_version=opset
+        )
+    tokenizer.save_pretrained(output_dir)
+    # Records the pad id the graph was traced with so the loader can check it against the tokenizer
+    model.config.save_pretrained(output_dir)
+    logger.info(f"ONNX model exported to {output_path}")
+    return output_path
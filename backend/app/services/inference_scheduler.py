@@ -0,0 +1,146 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+BATCH_SIZE = Histogram(
+    'inference_batch_size',
+    'Number of requests grouped into a single forward pass',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+QUEUE_WAIT = Histogram(
+    'inference_queue_wait_seconds',
+    'Time a request spent queued before its batch was run',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+BATCH_ERRORS = Counter('inference_batch_errors_total', 'Batched forward passes that raised')
+
+
+def _resolve(future: Future, result=None, error: Optional[Exception] = None):
+    """Set a caller's future unless it was cancelled or already resolved"""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class _PendingRequest:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """Gathers concurrent single predictions into padded batches
+
+    Callers submit a text and receive a Future. A background thread drains the
+    queue, waiting at most ``max_wait_ms`` after the first request for up to
+    ``max_batch_size`` requests to accumulate, then runs them through
+    ``batch_fn`` in one forward pass and resolves each caller's future.
+    Futures cancelled before their batch forms are dropped from it.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[str]], List[dict]], max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background batching thread"""
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Inference scheduler started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait * 1000:.1f})")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread, failing any requests still queued"""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._queue.put(None)  # Wake the loop
+        self._thread.join(timeout)
+        self._thread = None
+
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                _resolve(pending.future, error=RuntimeError("Inference scheduler stopped"))
+        logger.info("Inference scheduler stopped")
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for prediction and return a future for its result"""
+        if not self.running:
+            raise RuntimeError("Inference scheduler is not running")
+        pending = _PendingRequest(text)
+        self._queue.put(pending)
+        return pending.future
+
+    def _collect_batch(self) -> List[_PendingRequest]:
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                break
+            batch.append(pending)
+        # Claim each future so a late cancel() can no longer race the result; drop already-cancelled ones
+        return [pending for pending in batch if pending.future.set_running_or_notify_cancel()]
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            started_at = time.perf_counter()
+            BATCH_SIZE.observe(len(batch))
+            for pending in batch:
+                QUEUE_WAIT.observe(started_at - pending.enqueued_at)
+
+            try:
+                results = self.batch_fn([pending.text for pending in batch])
+            except Exception as e:
+                BATCH_ERRORS.inc()
+                logger.error(f"Batched inference failed for {len(batch)} requests: {str(e)}")
+                for pending in batch:
+                    _resolve(pending.future, error=e)
+                continue
+
+            for pending, result in zip(batch, results):
+                _resolve(pending.future, result)
@@ -0,0 +1,74 @@
+import logging
+from typing import List, Optional
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+REAL_TOKENS = Counter('inference_tokens_processed_total', 'Non-padding tokens run through the model')
+PADDING_TOKENS = Counter('inference_tokens_padded_total', 'Padding tokens run through the model')
+
+
+class LengthBucketBatcher:
+    """Groups inputs of similar token length into the same padded batch
+
+    SMS lengths are heavily skewed, so a single long message would otherwise
+    pad every short message in its batch up to its own length. Inputs are
+    sorted by token count and cut into batches capped by ``batch_size`` and by
+    ``max_batch_tokens`` (rows x padded length). ``plan`` returns index lists
+    into the original input, so callers can scatter results back in order.
+    """
+
+    def __init__(self, batch_size: int, max_batch_tokens: Optional[int] = None, sort_by_length: bool = True):
+        self.batch_size = max(1, batch_size)
+        self.max_batch_tokens = max_batch_tokens
+        self.sort_by_length = sort_by_length
+
+    def plan(self, lengths: List[int]) -> List[List[int]]:
+        """Split input indices into batches, shortest inputs first"""
+        order = list(range(len(lengths)))
+        if self.sort_by_length:
+            order.sort(key=lambda i: lengths[i])
+
+        batches = []
+        current: List[int] = []
+        current_max = 0
+        for i in order:
+            longest = max(current_max, lengths[i])
+            over_tokens = (
+                self.max_batch_tokens is not None
+                and current
+                and longest * (len(current) + 1) > self.max_batch_tokens
+            )
+            if current and (len(current) >= self.batch_size or over_tokens):
+                batches.append(current)
+                current, longest = [], lengths[i]
+            current.append(i)
+            current_max = longest
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def record_padding(lengths: List[int]) -> float:
+        """Record real vs padding tokens for one padded batch and return its efficiency"""
+        if not lengths:
+            return 1.0
+        real = sum(lengths)
+        padded = max(lengths) * len(lengths) - real
+        REAL_TOKENS.inc(real)
+        PADDING_TOKENS.inc(padded)
+        return real / (real + padded)
+
+    @staticmethod
+    def padding_report(lengths: List[int], batches: List[List[int]]) -> dict:
+        """Summarise how many real and padding tokens a batch plan will run"""
+        real = sum(lengths)
+        total = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
+        return {
+            "batches": len(batches),
+            "tokens_processed": real,
+            "tokens_padded": total - real,
+            "efficiency": real / total if total else 1.0
+        }
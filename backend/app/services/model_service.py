@@ -1,15 +1,77 @@
 import os
 import logging
+import json
+import time
+import uuid
+import zlib
+import random
 import hashlib
+import importlib.util
+from typing import Any, List, Optional, Tuple
 from app.core.config import settings
+from app.services.inference_backends import ONNX_MODEL_FILE, OnnxRuntimeBackend, TorchBackend
+from app.utils.local_cache import CACHE_LOOKUPS, LocalTTLCache
+from app.utils.prediction_codec import PredictionCodec
+from app.utils.single_flight import FORWARDS_SAVED, FlightAbandoned, SingleFlight
+from app.utils.text_canonicalizer import CanonicalAgreementGuard, TextCanonicalizer
 
 logger = logging.getLogger(__name__)
 
+# Prediction cache keys are "<prefix>:<model version>:<md5 of text>"
+CACHE_KEY_PREFIX = "sms_prediction"
+
+# Directory holding the LoRA adapters, adapter config and tokenizer
+LOCAL_ADAPTER_PATH = "../local_tinyllama_sms_spam_model"
+
+# Representative messages used to compare merged and unmerged logits at load time
+PARITY_SAMPLE_TEXTS = [
+    "Congratulations! You've won $1000! Click here to claim your prize now!",
+    "Hey, are we still meeting for lunch tomorrow?",
+    "URGENT: Your account will be suspended unless you verify immediately!",
+    "Thanks for the meeting today. I'll send the follow-up email shortly.",
+    "FREE! Get your iPhone now! Limited time offer! Call 1-800-FREE-GIFT"
+]
+
 class ModelService:
     def __init__(self):
         self.model = None
         self.tokenizer = None
         self.device = None
+        self.scheduler = None
+        self.inference_mode = None
+        self.model_source = None
+        self.model_version = None
+        self.quantization = "none"
+        self.backend = None
+        self.local_cache = None
+        if settings.LOCAL_CACHE_ENABLED:
+            self.local_cache = LocalTTLCache(
+                max_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+                ttl=settings.LOCAL_CACHE_TTL_S
+            )
+        # Cache key canonicalisation ("shadow" only measures prediction agreement)
+        self.canonicalizer = TextCanonicalizer(
+            unicode_normalize=settings.CACHE_KEY_UNICODE_NORMALIZE,
+            casefold=settings.CACHE_KEY_CASEFOLD,
+            mask_urls=settings.CACHE_KEY_MASK_URLS,
+            mask_numbers=settings.CACHE_KEY_MASK_NUMBERS
+        )
+        self.canonical_guard = None
+        if settings.CACHE_KEY_CANONICALIZATION == "shadow":
+            self.canonical_guard = CanonicalAgreementGuard(self.canonicalizer)
+        self.codec = self._make_codec("unversioned")
+        self.single_flight = SingleFlight() if settings.SINGLE_FLIGHT_ENABLED else None
+        self.cascade = None
+        self.near_duplicate_index = None
+        if settings.NEAR_DUPLICATE_ENABLED:
+            from app.utils.near_duplicate_index import MinHashLSHIndex
+            self.near_duplicate_index = MinHashLSHIndex(
+                threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+                num_perm=settings.NEAR_DUPLICATE_NUM_PERM,
+                bands=settings.NEAR_DUPLICATE_BANDS,
+                max_entries=settings.NEAR_DUPLICATE_MAX_ENTRIES,
+                ttl=settings.NEAR_DUPLICATE_TTL_S
+            )
         # Import Redis client
         try:
             from app.utils.redis_client import redis_client
@@ -18,14 +80,139 @@ class ModelService:
         except Exception as e:
             logger.warning(f"Failed to initialize Redis client: {e}")
             self.redis_client = None
+        # asyncio client for predict_async; Celery workers only use the sync client
+        try:
+            from app.utils.async_redis_client import async_redis_client
+            self.async_redis_client = async_redis_client
+        except Exception as e:
+            logger.warning(f"Failed to initialize async Redis client: {e}")
+            self.async_redis_client = None
         
     def _generate_cache_key(self, text: str) -> str:
         """Generate a cache key for the given text"""
+        if settings.CACHE_KEY_CANONICALIZATION == "on":
+            text = self.canonicalizer.canonicalize(text)
         text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-        return f"sms_prediction:{text_hash}"
+        return f"{CACHE_KEY_PREFIX}:{self.model_version or 'unversioned'}:{text_hash}"
+
+    def disable_caching(self):
+        """Send every prediction through the model (used by the benchmark scripts)"""
+        self.redis_client = None
+        self.async_redis_client = None
+        self.local_cache = None
+        self.near_duplicate_index = None
+
+    def start_scheduler(self):
+        """Start the micro-batching scheduler so concurrent predictions share forward passes"""
+        if not settings.INFERENCE_BATCHING_ENABLED:
+            logger.info("Inference batching disabled; predictions will run one at a time")
+            return
+        from app.services.inference_scheduler import InferenceScheduler
+        if self.scheduler is None:
+            self.scheduler = InferenceScheduler(
+                self._run_batch,
+                max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=settings.INFERENCE_MAX_WAIT_MS
+            )
+        self.scheduler.start()
+
+    def stop_scheduler(self):
+        """Stop the micro-batching scheduler"""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
         
     def load_model(self):
+        """Load the model and derive the model version that namespaces its cache entries"""
+        if settings.CASCADE_ENABLED:
+            self._load_cascade(settings.CASCADE_MODEL_PATH)
+
+        if not self._load_backend():
+            return False
+        self._set_model_version()
+        return True
+
+    def _set_model_version(self):
+        """Fingerprint the loaded artifact (or use MODEL_VERSION) and switch cache keys to its namespace"""
+        version = self._version_for(self.model_source)
+        if version != self.model_version:
+            self.model_version = version
+            self.codec = self._make_codec(version)
+            if self.local_cache is not None:
+                self.local_cache.clear()
+        logger.info(f"Model version {self.model_version}; cache namespace {CACHE_KEY_PREFIX}:{self.model_version}")
+
+    @staticmethod
+    def _version_for(model_source: Optional[str]) -> str:
+        from app.utils.model_artifacts import artifact_fingerprint
+
+        if settings.MODEL_VERSION:
+            return settings.MODEL_VERSION
+        try:
+            return artifact_fingerprint(model_source)
+        except OSError as e:
+            logger.warning(f"Could not fingerprint {model_source}: {e}")
+            return "unversioned"
+
+    def live_model_version(self) -> str:
+        """Version of the loaded model, or of the artifact load_model would serve, without loading weights"""
+        if self.model_version is not None:
+            return self.model_version
+        _, source, _ = self._resolve_model_source()
+        return self._version_for(source)
+
+    @staticmethod
+    def _make_codec(version: str) -> PredictionCodec:
+        return PredictionCodec(model_tag=zlib.crc32(version.encode('utf-8')), float16=settings.CACHE_RECORD_FLOAT16)
+
+    def retire_cache_namespace(self, version: str, batch_size: int = 500) -> int:
+        """Incrementally delete the Redis cache entries of a model version that is no longer served
+
+        ``version="legacy"`` removes keys written before cache keys carried a model version.
+        """
+        if version == self.live_model_version():
+            raise ValueError(f"Refusing to retire the namespace of the live model ({version})")
+        if not (self.redis_client and self.redis_client.connected):
+            raise RuntimeError("Redis is not connected")
+        if version == "legacy":
+            # Old keys are "<prefix>:<32 hex chars>" with no version segment
+            return self.redis_client.unlink_matching(f"{CACHE_KEY_PREFIX}:" + "[0-9a-f]" * 32, batch_size=batch_size)
+        return self.redis_client.unlink_matching(f"{CACHE_KEY_PREFIX}:{version}:*", batch_size=batch_size)
+
+    def _resolve_model_source(self) -> Tuple[str, str, Any]:
+        """Decide which backend and artifact load_model serves, without loading any weights
+
+        Applies the fallbacks (unreachable pool -> in-process, unusable ONNX
+        export -> PyTorch) and returns (backend, path, handle), where handle is
+        the connected pool client or the ONNX tokenizer for the loader to reuse.
+        """
+        from app.utils.model_artifacts import is_merged_artifact
+
+        torch_source = settings.MERGED_MODEL_PATH if is_merged_artifact(settings.MERGED_MODEL_PATH) else LOCAL_ADAPTER_PATH
+        if settings.INFERENCE_POOL_ENABLED:
+            client = self._inference_pool_client()
+            if client is not None:
+                return "pool", torch_source, client
+            logger.warning("Falling back to loading the model in-process")
+
+        if settings.INFERENCE_BACKEND == "onnx":
+            tokenizer = self._onnx_tokenizer(settings.ONNX_MODEL_PATH)
+            if tokenizer is not None:
+                return "onnx", settings.ONNX_MODEL_PATH, tokenizer
+            logger.warning("Falling back to the PyTorch backend")
+
+        return ("merged" if torch_source != LOCAL_ADAPTER_PATH else "peft"), torch_source, None
+
+    def _load_backend(self):
         """Load the TinyLlama model with local PEFT adapters for sequence classification"""
+        backend, path, handle = self._resolve_model_source()
+        if backend == "pool":
+            return self._connect_inference_pool(handle, path)
+        if backend == "onnx":
+            return self._load_onnx_backend(path, handle)
+        if backend == "merged":
+            return self._load_merged_artifact(path)
+
         try:
             # Import here to avoid import errors if libraries are not available
             import torch
@@ -36,7 +223,7 @@ class ModelService:
             logger.info("Loading local TinyLlama model with PEFT adapters for sequence classification")
             
             # Load PEFT config first to understand the exact architecture
-            local_adapter_path = "../local_tinyllama_sms_spam_model"
+            local_adapter_path = LOCAL_ADAPTER_PATH
             peft_config = PeftConfig.from_pretrained(local_adapter_path)
             logger.info(f"PEFT config loaded: task_type={peft_config.task_type}, modules_to_save={getattr(peft_config, 'modules_to_save', 'None')}")
             
@@ -57,7 +244,8 @@ class ModelService:
             # Set padding token if not present
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
-                base_model.config.pad_token_id = self.tokenizer.eos_token_id
+            # The base config ships without pad_token_id; the classifier needs it to pool padded batches
+            base_model.config.pad_token_id = self.tokenizer.pad_token_id
             
             # Apply local PEFT adapters with proper error handling
             logger.info(f"Applying local PEFT adapters from: {local_adapter_path}")
@@ -145,6 +333,17 @@ class ModelService:
             
             # Set to evaluation mode
             self.model.eval()
+            self.inference_mode = "peft"
+            self.model_source = local_adapter_path
+            
+            # Fold the LoRA adapters into the base weights for the fast path
+            if settings.INFERENCE_MODE == "merged":
+                self.model = self._merge_adapters(self.model)
+                if self.inference_mode != "merged":
+                    logger.warning("INFERENCE_MODE=merged was requested but the merge was abandoned; "
+                                   "serving the slower unmerged PEFT model")
+            self.model = self._quantize(self.model)
+            self.backend = TorchBackend(self.model, self.tokenizer, self.device, pooled_head=settings.INFERENCE_POOLED_HEAD)
             
             logger.info(f"Using device: {self.device}")
             logger.info("Model loaded successfully")
@@ -155,75 +354,784 @@ class ModelService:
             logger.error(f"Full traceback: ", exc_info=True)
             return False
     
+    def _load_cascade(self, path: Optional[str]) -> bool:
+        """Load the first-stage classifier trained by scripts/train_cascade_model.py"""
+        if not path or not os.path.exists(path):
+            logger.error(f"No cascade model found at {path}; train one with scripts/train_cascade_model.py")
+            return False
+        try:
+            from app.services.cascade_classifier import CascadeRouter, HashedNgramClassifier
+
+            self.cascade = CascadeRouter(
+                HashedNgramClassifier.load(path),
+                spam_threshold=settings.CASCADE_SPAM_THRESHOLD,
+                ham_threshold=settings.CASCADE_HAM_THRESHOLD
+            )
+            logger.info(f"Cascade first stage loaded from {path} "
+                        f"(ham <= {settings.CASCADE_HAM_THRESHOLD}, spam >= {settings.CASCADE_SPAM_THRESHOLD})")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading cascade model: {str(e)}")
+            return False
+
+    @staticmethod
+    def _inference_pool_client():
+        """A client for the inference worker pool if it answers, else None"""
+        try:
+            from app.workers.inference_pool import InferencePoolClient, client_authkey
+
+            client = InferencePoolClient(settings.INFERENCE_POOL_ADDRESS, client_authkey())
+            workers = client.ping()
+            logger.info(f"Inference pool at {settings.INFERENCE_POOL_ADDRESS} is up ({workers} workers)")
+            return client
+        except Exception as e:
+            logger.error(f"Could not connect to inference pool: {str(e)}")
+            return None
+
+    def _connect_inference_pool(self, client, tokenizer_path: str) -> bool:
+        """Use the dedicated inference worker pool; only the tokenizer is loaded in this process"""
+        try:
+            from transformers import AutoTokenizer
+            from app.workers.inference_pool import RemotePoolBackend
+
+            self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+
+            self.backend = RemotePoolBackend(client)
+            self.model = self.backend
+            self.inference_mode = "remote"
+            self.model_source = tokenizer_path
+            logger.info(f"Connected to inference pool at {settings.INFERENCE_POOL_ADDRESS}")
+            return True
+        except Exception as e:
+            logger.error(f"Could not connect to inference pool: {str(e)}")
+            return False
+
+    @staticmethod
+    def _onnx_tokenizer(path: Optional[str]):
+        """The tokenizer of a usable ONNX export at path, or None if it is missing or traced with another pad id"""
+        if not path or not os.path.exists(os.path.join(path, ONNX_MODEL_FILE)):
+            logger.error(f"No ONNX model found at {path}; export one with scripts/export_onnx_model.py")
+            return None
+        if importlib.util.find_spec("onnxruntime") is None:
+            logger.error("onnxruntime is not installed; cannot serve the ONNX export")
+            return None
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(path)
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+
+            # The graph pools on the pad id it was traced with; exports without one break padded batches
+            config_path = os.path.join(path, "config.json")
+            traced_pad_id = None
+            if os.path.exists(config_path):
+                with open(config_path) as f:
+                    traced_pad_id = json.load(f).get("pad_token_id")
+            if traced_pad_id != tokenizer.pad_token_id:
+                logger.error(f"ONNX export at {path} was traced with pad_token_id={traced_pad_id}, "
+                             f"tokenizer pads with {tokenizer.pad_token_id}; re-run scripts/export_onnx_model.py")
+                return None
+            return tokenizer
+        except Exception as e:
+            logger.error(f"Error reading ONNX export at {path}: {str(e)}")
+            return None
+
+    def _load_onnx_backend(self, path: str, tokenizer) -> bool:
+        """Serve an ONNX export of the merged model through ONNX Runtime"""
+        try:
+            import torch
+
+            logger.info(f"Loading ONNX Runtime backend from: {path}")
+            self.tokenizer = tokenizer
+            self.backend = OnnxRuntimeBackend(path, self.tokenizer, intra_op_threads=settings.ONNX_INTRA_OP_THREADS)
+            self.model = self.backend.session
+            self.device = torch.device("cpu")
+            self.inference_mode = "merged"
+            self.model_source = path
+            self.quantization = "none"
+
+            logger.info("ONNX Runtime backend loaded successfully")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading ONNX Runtime backend: {str(e)}")
+            logger.error("Full traceback: ", exc_info=True)
+            return False
+
+    def _load_merged_artifact(self, path: str) -> bool:
+        """Load a pre-merged model exported by scripts/export_merged_model.py via mmap"""
+        try:
+            import torch
+            from transformers import AutoTokenizer
+            from app.utils.model_artifacts import load_merged_model
+
+            logger.info(f"Loading pre-merged model artifact from: {path}")
+            self.tokenizer = AutoTokenizer.from_pretrained(path)
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+
+            self.model = load_merged_model(path)
+            # Artifacts exported before the config carried a pad id would fail on padded batches
+            self.model.config.pad_token_id = self.tokenizer.pad_token_id
+
+            # Moving to CUDA copies the weights; on CPU they stay mapped from the file
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            self.model = self.model.to(self.device)
+            self.inference_mode = "merged"
+            self.model_source = path
+            self.model = self._quantize(self.model)
+            self.backend = TorchBackend(self.model, self.tokenizer, self.device, pooled_head=settings.INFERENCE_POOLED_HEAD)
+
+            logger.info(f"Using device: {self.device}")
+            logger.info("Pre-merged model loaded successfully")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading pre-merged model: {str(e)}")
+            logger.error("Full traceback: ", exc_info=True)
+            return False
+
+    def _merge_adapters(self, peft_model):
+        """Merge LoRA adapters into the base weights and drop the PEFT wrapper
+
+        The merge is checked against the unmerged model on a few sample
+        messages before the wrapper is removed; if the logits drift beyond
+        MERGE_PARITY_ATOL the merge is reverted and the PEFT model is kept.
+        """
+        import torch
+        from peft.utils import ModulesToSaveWrapper
+
+        merged = False
+        try:
+            # Capture the trained classification head as the PEFT model sees it
+            score_weight = None
+            for name, module in peft_model.named_modules():
+                if name.endswith("score") and isinstance(module, ModulesToSaveWrapper):
+                    score_weight = module.modules_to_save[module.active_adapter].weight.detach().clone()
+                    break
+            if score_weight is None:
+                score_weight = peft_model.base_model.model.score.weight.detach().clone()
+
+            reference_logits = self._sample_logits(peft_model)
+            peft_model.merge_adapter()
+            merged = True
+            merged_logits = self._sample_logits(peft_model)
+
+            max_diff = (reference_logits - merged_logits).abs().max().item()
+            if max_diff > settings.MERGE_PARITY_ATOL:
+                peft_model.unmerge_adapter()
+                logger.error(f"Merged logits differ from unmerged by {max_diff:.6f} (tolerance {settings.MERGE_PARITY_ATOL}); keeping PEFT model")
+                return peft_model
+            logger.info(f"Merge parity check passed (max logit difference {max_diff:.6f})")
+
+            # Adapters are already merged in place, so unload only strips the wrappers
+            merged_model = peft_model.unload()
+            merged = False
+            with torch.no_grad():
+                merged_model.score.weight.copy_(score_weight)
+            merged_model.eval()
+
+            self.inference_mode = "merged"
+            logger.info("LoRA adapters merged into base weights; PEFT wrapper removed")
+            return merged_model
+        except Exception as e:
+            logger.error(f"Failed to merge LoRA adapters, keeping PEFT model: {str(e)}", exc_info=True)
+            if merged:
+                peft_model.unmerge_adapter()
+            return peft_model
+
+    def _quantize(self, model):
+        """Apply the configured post-training quantization to a loaded model
+
+        ``dynamic_int8`` swaps the decoder's Linear layers for dynamically
+        quantized int8 kernels (weights int8, activations quantized per batch).
+        The score head stays in full precision. It is a CPU-only mode and needs
+        a plain (merged) model, since the LoRA wrappers read their layers'
+        float weights directly.
+        """
+        mode = settings.INFERENCE_QUANTIZATION
+        self.quantization = "none"
+        if mode == "none":
+            return model
+        if mode != "dynamic_int8":
+            logger.warning(f"Unknown INFERENCE_QUANTIZATION '{mode}', running unquantized")
+            return model
+        if self.device is None or self.device.type != "cpu":
+            logger.warning("Dynamic int8 quantization is CPU-only; running unquantized")
+            return model
+        if self.inference_mode != "merged":
+            logger.warning("Dynamic int8 quantization requires INFERENCE_MODE=merged; running unquantized")
+            return model
+
+        try:
+            import torch
+
+            # Dynamic quantization kernels take float32 activations
+            model = model.float()
+            # quantize_dynamic keeps the config; make sure padded batches can be pooled
+            model.config.pad_token_id = self.tokenizer.pad_token_id
+            linear_layers = {
+                name for name, module in model.named_modules()
+                if isinstance(module, torch.nn.Linear) and not name.endswith("score")
+            }
+            model = torch.ao.quantization.quantize_dynamic(model, linear_layers, dtype=torch.qint8)
+            model.eval()
+            self.quantization = mode
+            logger.info(f"Applied dynamic int8 quantization to {len(linear_layers)} Linear layers")
+            return model
+        except Exception as e:
+            logger.error(f"Failed to quantize model, running unquantized: {str(e)}")
+            return model
+
+    def _sample_logits(self, model):
+        """Run the parity sample messages through a model and return the raw logits"""
+        import torch
+
+        inputs = self.tokenizer(
+            PARITY_SAMPLE_TEXTS,
+            return_tensors="pt",
+            truncation=True,
+            max_length=settings.INFERENCE_MAX_TOKENS,
+            padding=True
+        ).to(self.device)
+        with torch.no_grad():
+            return model(**inputs).logits.float().cpu()
+
     def predict(self, text: str) -> dict:
         """Predict if an SMS is spam or not with Redis caching"""
         if not self.model or not self.tokenizer:
             raise ValueError("Model not loaded. Call load_model() first.")
             
-        # Generate cache key
-        cache_key = self._generate_cache_key(text)
-        
         # Try to get result from cache first
-        if self.redis_client and self.redis_client.connected:
+        cache_key = self._generate_cache_key(text)
+        cached_result = self._get_cached(text, cache_key)
+        if cached_result:
+            return cached_result
+
+        if self.single_flight is None:
+            return self._predict_uncached(text, cache_key)
+
+        # Identical concurrent requests wait on the first one instead of running their own forward
+        while True:
+            future, leader = self.single_flight.join(cache_key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except FlightAbandoned:
+                continue
+        try:
+            result = self._predict_uncached(text, cache_key)
+        except Exception as e:
+            self.single_flight.resolve(cache_key, error=e)
+            raise
+        except BaseException:
+            self.single_flight.abandon(cache_key)
+            raise
+        self.single_flight.resolve(cache_key, result)
+        return result
+
+    def _predict_uncached(self, text: str, cache_key: str) -> dict:
+        """Run one prediction through the model (or wait for another process's) and cache it"""
+        lock_token = None
+        if self._cross_process_lock_enabled():
+            lock_token, peer_result = self._acquire_prediction_lock(text, cache_key)
+            if peer_result is not None:
+                return peer_result
+        try:
             try:
-                cached_result = self.redis_client.get(cache_key)
-                if cached_result:
-                    logger.info(f"Cache hit for prediction: {text[:50]}...")
-                    return cached_result
+                if self.scheduler is not None and self.scheduler.running:
+                    result = self.scheduler.submit(text).result()
                 else:
-                    logger.info(f"Cache miss for prediction: {text[:50]}...")
+                    result = self._run_batch([text])[0]
             except Exception as e:
-                logger.warning(f"Error checking cache: {e}")
-        
+                logger.error(f"Error during prediction: {str(e)}")
+                raise
+
+            self._observe_canonical(text, result)
+            self._set_cached(text, cache_key, result)
+            return result
+        finally:
+            if lock_token is not None:
+                self.redis_client.release_lock(self._lock_key(cache_key), lock_token)
+
+    async def predict_async(self, text: str) -> dict:
+        """Awaitable predict that keeps blocking cache I/O and inference off the event loop
+
+        Redis is awaited through the asyncio client. With the scheduler running
+        the request waits on its batch future without holding a thread;
+        otherwise the forward runs in the bounded inference pool.
+        """
+        import asyncio
+
+        if not self.model or not self.tokenizer:
+            raise ValueError("Model not loaded. Call load_model() first.")
+
+        # The in-process tier answers without leaving the event loop
+        cache_key = self._generate_cache_key(text)
+        cached_result = self._get_local(cache_key)
+        if cached_result is None:
+            cached_result = await self._get_redis_async(text, cache_key)
+        if cached_result:
+            return cached_result
+
+        if self.single_flight is None:
+            return await self._predict_uncached_async(text, cache_key)
+
+        while True:
+            future, leader = self.single_flight.join(cache_key)
+            if leader:
+                break
+            try:
+                # Shielded so a waiter's own cancellation does not cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except FlightAbandoned:
+                continue
+        # The leader's work runs as its own task so a client disconnect does not stop it:
+        # the forward still finishes, gets cached and is handed to the waiters
+        task = asyncio.ensure_future(self._predict_uncached_async(text, cache_key))
+        task.add_done_callback(lambda done: self._finish_flight(cache_key, done))
+        return await asyncio.shield(task)
+
+    def _finish_flight(self, cache_key: str, task):
+        """Publish a leader task's outcome to its single-flight waiters"""
+        error = None if task.cancelled() else task.exception()
+        if task.cancelled() or (error is not None and not isinstance(error, Exception)):
+            # Stopped without a result (e.g. loop shutdown): release the flight so a waiter takes over
+            self.single_flight.abandon(cache_key)
+        elif error is not None:
+            self.single_flight.resolve(cache_key, error=error)
+        else:
+            self.single_flight.resolve(cache_key, task.result())
+
+    async def _predict_uncached_async(self, text: str, cache_key: str) -> dict:
+        """Async counterpart of _predict_uncached"""
+        import asyncio
+        from app.core.execution import execution_pool
+
+        lock_token = None
+        if settings.SINGLE_FLIGHT_REDIS_LOCK and self._async_redis_available():
+            lock_token, peer_result = await self._acquire_prediction_lock_async(text, cache_key)
+            if peer_result is not None:
+                return peer_result
         try:
-            # Import here to avoid import errors
-            import torch
-            
-            # Tokenize input for sequence classification
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            ).to(self.device)
-            
-            # Run prediction
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                confidence, predicted_class = torch.max(predictions, dim=-1)
-                
-                # Convert to Python types
-                confidence = confidence.item()
-                predicted_class = predicted_class.item()
-                
-                # Map class indices to labels (fixing the label mapping)
-                # Based on training: class 1 = spam, class 0 = not_spam
-                label = "spam" if predicted_class == 1 else "not_spam"
-                
-                result = {
-                    "prediction": label,
-                    "confidence": confidence,
-                    "class_probabilities": {
-                        "not_spam": predictions[0][0].item(),
-                        "spam": predictions[0][1].item()
-                    }
-                }
-                
-                # Cache the result for future requests
-                if self.redis_client and self.redis_client.connected:
+            try:
+                if self.scheduler is not None and self.scheduler.running:
+                    execution_pool.admit()
                     try:
-                        self.redis_client.set(cache_key, result, expire=3600)  # Cache for 1 hour
-                        logger.info(f"Result cached for: {text[:50]}...")
-                    except Exception as e:
-                        logger.warning(f"Error caching result: {e}")
-                
-                return result
-                
+                        future = self.scheduler.submit(text)
+                    except BaseException:
+                        execution_pool.release()
+                        raise
+                    # The slot is held until the batch runs, even if this caller goes away first
+                    future.add_done_callback(lambda _: execution_pool.release())
+                    # Shielded so a cancelled request never cancels the scheduler's future
+                    result = await asyncio.shield(asyncio.wrap_future(future))
+                else:
+                    result = (await execution_pool.run_inference(self._run_batch, [text]))[0]
+            except Exception as e:
+                logger.error(f"Error during prediction: {str(e)}")
+                raise
+
+            self._observe_canonical(text, result)
+            await self._set_cached_async(text, cache_key, result)
+            return result
+        finally:
+            if lock_token is not None:
+                await self.async_redis_client.release_lock(self._lock_key(cache_key), lock_token)
+
+    def _cross_process_lock_enabled(self) -> bool:
+        return settings.SINGLE_FLIGHT_REDIS_LOCK and bool(self.redis_client and self.redis_client.connected)
+
+    @staticmethod
+    def _lock_key(cache_key: str) -> str:
+        return f"lock:{cache_key}"
+
+    def _try_prediction_lock(self, text: str, cache_key: str, token: str) -> Tuple[bool, Optional[dict]]:
+        """One attempt to take the per-key Redis lock; on failure check whether the holder has cached a result"""
+        if self.redis_client.acquire_lock(self._lock_key(cache_key), token, settings.SINGLE_FLIGHT_LOCK_TTL_MS):
+            return True, None
+        return False, self._get_redis(text, cache_key)
+
+    def _acquire_prediction_lock(self, text: str, cache_key: str) -> Tuple[Optional[str], Optional[dict]]:
+        """Take the cross-process lock, or wait for the process holding it to cache its result
+
+        Returns (lock token, None) when this process should run the forward, or
+        (None, result) when another process produced it. After
+        SINGLE_FLIGHT_WAIT_TIMEOUT_S the forward runs without the lock.
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_TIMEOUT_S
+        while True:
+            acquired, peer_result = self._try_prediction_lock(text, cache_key, token)
+            if acquired:
+                return token, None
+            if peer_result is not None:
+                FORWARDS_SAVED.labels(scope="redis").inc()
+                return None, peer_result
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for another process to predict: {text[:50]}...")
+                return None, None
+            time.sleep(settings.SINGLE_FLIGHT_POLL_MS / 1000)
+
+    async def _acquire_prediction_lock_async(self, text: str, cache_key: str) -> Tuple[Optional[str], Optional[dict]]:
+        """Async counterpart of _acquire_prediction_lock; polls without blocking the event loop"""
+        import asyncio
+
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_TIMEOUT_S
+        while True:
+            if await self.async_redis_client.acquire_lock(self._lock_key(cache_key), token, settings.SINGLE_FLIGHT_LOCK_TTL_MS):
+                return token, None
+            peer_result = await self._get_redis_async(text, cache_key)
+            if peer_result is not None:
+                FORWARDS_SAVED.labels(scope="redis").inc()
+                return None, peer_result
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for another process to predict: {text[:50]}...")
+                return None, None
+            await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_MS / 1000)
+
+    async def predict_many_async(self, texts: List[str], batch_size: Optional[int] = None) -> List[dict]:
+        """Awaitable predict_many that runs in the bounded inference pool"""
+        from app.core.execution import execution_pool
+
+        return await execution_pool.run_inference(self.predict_many, texts, batch_size)
+
+    def _observe_canonical(self, text: str, result: dict):
+        """Feed a fresh prediction to the canonical-key agreement guard when shadowing"""
+        if self.canonical_guard is not None and not result.get("near_duplicate"):
+            self.canonical_guard.observe(text, result["prediction"])
+
+    def _get_cached(self, text: str, cache_key: str) -> Optional[dict]:
+        """Read-through lookup: in-process tier first, then Redis"""
+        cached_result = self._get_local(cache_key)
+        if cached_result is not None:
+            return cached_result
+        return self._get_redis(text, cache_key)
+
+    def _get_local(self, cache_key: str) -> Optional[dict]:
+        """Look up a prediction in the in-process cache tier"""
+        if self.local_cache is None:
+            return None
+        return self.local_cache.get(cache_key)
+
+    def _get_redis(self, text: str, cache_key: str) -> Optional[dict]:
+        """Look up a prediction in Redis, filling the in-process tier on a hit"""
+        if not (self.redis_client and self.redis_client.connected):
+            return None
+        try:
+            cached_result = self._read_records([cache_key])[0]
+            if cached_result:
+                CACHE_LOOKUPS.labels(tier="redis", result="hit").inc()
+                logger.info(f"Cache hit for prediction: {text[:50]}...")
+                if self.local_cache is not None:
+                    self.local_cache.set(cache_key, cached_result)
+                return cached_result
+            CACHE_LOOKUPS.labels(tier="redis", result="miss").inc()
+            logger.info(f"Cache miss for prediction: {text[:50]}...")
         except Exception as e:
-            logger.error(f"Error during prediction: {str(e)}")
-            raise
+            logger.warning(f"Error checking cache: {e}")
+        return None
+
+    async def _get_redis_async(self, text: str, cache_key: str) -> Optional[dict]:
+        """Async counterpart of _get_redis, awaited on the event loop"""
+        if not self._async_redis_available():
+            return None
+        try:
+            cached_result = (await self._read_records_async([cache_key]))[0]
+            if cached_result:
+                CACHE_LOOKUPS.labels(tier="redis", result="hit").inc()
+                logger.info(f"Cache hit for prediction: {text[:50]}...")
+                if self.local_cache is not None:
+                    self.local_cache.set(cache_key, cached_result)
+                return cached_result
+            CACHE_LOOKUPS.labels(tier="redis", result="miss").inc()
+            logger.info(f"Cache miss for prediction: {text[:50]}...")
+        except Exception as e:
+            logger.warning(f"Error checking cache: {e}")
+        return None
+
+    async def _set_cached_async(self, text: str, cache_key: str, result: dict):
+        """Async counterpart of _set_cached"""
+        if self.local_cache is not None:
+            self.local_cache.set(cache_key, result)
+        if not self._async_redis_available():
+            return
+        try:
+            if await self.async_redis_client.set_raw(cache_key, self._encode_record(result), expire=settings.CACHE_TTL_S):
+                logger.info(f"Result cached for: {text[:50]}...")
+        except Exception as e:
+            logger.warning(f"Error caching result: {e}")
+
+    def _async_redis_available(self) -> bool:
+        return bool(self.async_redis_client and self.async_redis_client.connected)
+
+    def _set_cached(self, text: str, cache_key: str, result: dict):
+        """Write-through: cache a prediction in the in-process tier and in Redis"""
+        if self.local_cache is not None:
+            self.local_cache.set(cache_key, result)
+        if not (self.redis_client and self.redis_client.connected):
+            return
+        try:
+            self.redis_client.set_raw(cache_key, self._encode_record(result), expire=settings.CACHE_TTL_S)
+            logger.info(f"Result cached for: {text[:50]}...")
+        except Exception as e:
+            logger.warning(f"Error caching result: {e}")
+
+    def _get_cached_many(self, cache_keys: List[str]) -> List[Optional[dict]]:
+        """Bulk read-through lookup: in-process tier, then a single Redis MGET for the rest"""
+        results = [self._get_local(cache_key) for cache_key in cache_keys]
+        remote_indices = [i for i, result in enumerate(results) if result is None]
+        if not remote_indices or not (self.redis_client and self.redis_client.connected):
+            return results
+
+        try:
+            remote_results = self._read_records([cache_keys[i] for i in remote_indices])
+        except Exception as e:
+            logger.warning(f"Error checking cache: {e}")
+            return results
+
+        for i, cached_result in zip(remote_indices, remote_results):
+            if cached_result:
+                CACHE_LOOKUPS.labels(tier="redis", result="hit").inc()
+                results[i] = cached_result
+                if self.local_cache is not None:
+                    self.local_cache.set(cache_keys[i], cached_result)
+            else:
+                CACHE_LOOKUPS.labels(tier="redis", result="miss").inc()
+        return results
+
+    def _read_records(self, cache_keys: List[str]) -> List[Optional[dict]]:
+        """Fetch and decode Redis cache records in one round trip
+
+        Both record formats are readable. With binary records enabled, legacy
+        JSON records found on read are rewritten in place (keeping their TTL).
+        """
+        raw_records = self.redis_client.mget_raw(cache_keys) if len(cache_keys) > 1 else [self.redis_client.get_raw(cache_keys[0])]
+        results, upgrades = self._decode_records(cache_keys, raw_records)
+        for cache_key, record in upgrades.items():
+            self.redis_client.set_raw(cache_key, record, keep_ttl=True)
+        return results
+
+    async def _read_records_async(self, cache_keys: List[str]) -> List[Optional[dict]]:
+        """Async counterpart of _read_records on the asyncio Redis client"""
+        client = self.async_redis_client
+        raw_records = await client.mget_raw(cache_keys) if len(cache_keys) > 1 else [await client.get_raw(cache_keys[0])]
+        results, upgrades = self._decode_records(cache_keys, raw_records)
+        for cache_key, record in upgrades.items():
+            await client.set_raw(cache_key, record, keep_ttl=True)
+        return results
+
+    def _decode_records(self, cache_keys: List[str], raw_records: List[Optional[bytes]]) -> Tuple[List[Optional[dict]], dict]:
+        """Decode raw cache records; also returns binary rewrites for any legacy JSON records"""
+        results, upgrades = [], {}
+        for cache_key, raw in zip(cache_keys, raw_records):
+            result = self.codec.decode(raw)
+            if result is not None and settings.CACHE_RECORD_FORMAT == "binary" and self.codec.is_legacy(raw):
+                try:
+                    upgrades[cache_key] = self.codec.encode(result)
+                except Exception as e:
+                    logger.warning(f"Could not upgrade legacy cache record {cache_key}: {e}")
+            results.append(result)
+        return results, upgrades
+
+    def _encode_record(self, result: dict) -> bytes:
+        """Serialize a prediction in the configured cache record format"""
+        if settings.CACHE_RECORD_FORMAT == "binary":
+            return self.codec.encode(result)
+        return json.dumps(result).encode('utf-8')
+
+    def _set_cached_many(self, items: dict):
+        """Bulk write-through: fill the in-process tier and pipeline SETEX to Redis"""
+        if not items:
+            return
+        if self.local_cache is not None:
+            for cache_key, result in items.items():
+                self.local_cache.set(cache_key, result)
+        if not (self.redis_client and self.redis_client.connected):
+            return
+        try:
+            records = {cache_key: self._encode_record(result) for cache_key, result in items.items()}
+            self.redis_client.set_many_raw(records, expire=settings.CACHE_TTL_S)
+            logger.info(f"Cached {len(items)} batch results")
+        except Exception as e:
+            logger.warning(f"Error caching results: {e}")
+
+    def predict_many(self, texts: List[str], batch_size: Optional[int] = None) -> List[dict]:
+        """Predict a list of SMS texts with a single tokenization pass and chunked padded forwards
+
+        Cached results are reused; only the misses go through the model.
+        Results are returned in the same order as ``texts``.
+        """
+        if not self.model or not self.tokenizer:
+            raise ValueError("Model not loaded. Call load_model() first.")
+
+        results: List[Optional[dict]] = [None] * len(texts)
+        cache_keys = [self._generate_cache_key(text) for text in texts]
+
+        # Resolve all cache hits first (one Redis round trip for the whole batch)
+        miss_indices = []
+        for i, cached_result in enumerate(self._get_cached_many(cache_keys)):
+            if cached_result:
+                results[i] = cached_result
+            else:
+                miss_indices.append(i)
+        logger.info(f"Batch prediction: {len(texts) - len(miss_indices)} cache hits, {len(miss_indices)} misses")
+
+        # Misses already in flight elsewhere in this process are waited on, not recomputed
+        waiting = {}
+        if self.single_flight is not None:
+            leading = []
+            for i in miss_indices:
+                future, leader = self.single_flight.join(cache_keys[i])
+                if leader:
+                    leading.append(i)
+                else:
+                    waiting[i] = future
+            miss_indices = leading
+
+        if miss_indices:
+            try:
+                miss_results = self._run_batch([texts[i] for i in miss_indices], batch_size=batch_size)
+            except Exception as e:
+                logger.error(f"Error during batch prediction: {str(e)}")
+                if self.single_flight is not None:
+                    for i in miss_indices:
+                        self.single_flight.resolve(cache_keys[i], error=e)
+                raise
+            except BaseException:
+                if self.single_flight is not None:
+                    for i in miss_indices:
+                        self.single_flight.abandon(cache_keys[i])
+                raise
+
+            for i, result in zip(miss_indices, miss_results):
+                results[i] = result
+                self._observe_canonical(texts[i], result)
+            # Write the misses back in one pipeline
+            self._set_cached_many({cache_keys[i]: results[i] for i in miss_indices})
+            if self.single_flight is not None:
+                for i in miss_indices:
+                    self.single_flight.resolve(cache_keys[i], results[i])
+
+        # Resolve our own keys before waiting so two batches sharing texts cannot deadlock
+        for i, future in waiting.items():
+            try:
+                results[i] = future.result()
+            except FlightAbandoned:
+                # The leader was cancelled; predict re-joins and may lead the retry itself
+                results[i] = self.predict(texts[i])
+
+        return results
+
+    def _run_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[dict]:
+        """Answer near-duplicates of recently classified messages from the index, infer the rest
+
+        A small sample of near-duplicate hits (NEAR_DUPLICATE_VERIFY_RATE) still
+        runs through the model so the false-agreement rate can be tracked.
+        """
+        index = self.near_duplicate_index
+        if index is None:
+            return self._classify(texts, batch_size)
+
+        results: List[Optional[dict]] = [None] * len(texts)
+        matches = {}
+        infer_indices = []
+        for i, text in enumerate(texts):
+            match = index.query(text)
+            if match is None or random.random() < settings.NEAR_DUPLICATE_VERIFY_RATE:
+                infer_indices.append(i)
+                if match is not None:
+                    matches[i] = match
+            else:
+                results[i] = dict(match, near_duplicate=True)
+
+        if infer_indices:
+            for i, result in zip(infer_indices, self._classify([texts[i] for i in infer_indices], batch_size)):
+                results[i] = result
+                if i in matches:
+                    index.record_verification(matches[i]["prediction"] == result["prediction"])
+                index.add(texts[i], result)
+        return results
+
+    def _classify(self, texts: List[str], batch_size: Optional[int] = None) -> List[dict]:
+        """Let the cascade's first stage answer confident messages and escalate the rest to the model"""
+        if self.cascade is None:
+            return self._infer(texts, batch_size)
+
+        answered, escalate = self.cascade.route(texts)
+        results: List[Optional[dict]] = [None] * len(texts)
+        for i, spam_prob in answered.items():
+            results[i] = dict(self._format_result([1.0 - spam_prob, spam_prob]), stage="cascade")
+        if escalate:
+            for i, result in zip(escalate, self._infer([texts[i] for i in escalate], batch_size)):
+                results[i] = result
+        return results
+
+    def _infer(self, texts: List[str], batch_size: Optional[int] = None) -> List[dict]:
+        """Tokenize all texts at once, then run length-bucketed padded forward passes
+
+        Texts are grouped by token count so short messages are not padded up
+        to the longest message in the request; results come back in input order.
+        """
+        from app.services.length_batcher import LengthBucketBatcher
+
+        batcher = LengthBucketBatcher(
+            batch_size or settings.INFERENCE_BATCH_CHUNK_SIZE,
+            max_batch_tokens=settings.INFERENCE_MAX_BATCH_TOKENS,
+            sort_by_length=settings.INFERENCE_LENGTH_BUCKETING
+        )
+
+        # Tokenize the whole list in one call; padding is applied per batch
+        encodings = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=settings.INFERENCE_MAX_TOKENS,
+            padding=False
+        )
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        batches = batcher.plan(lengths)
+        if len(texts) > 1:
+            report = batcher.padding_report(lengths, batches)
+            logger.info(
+                f"Running {len(texts)} texts in {report['batches']} batches: "
+                f"{report['tokens_processed']} tokens processed, {report['tokens_padded']} padded "
+                f"({report['efficiency']:.1%} efficiency)"
+            )
+
+        results: List[Optional[dict]] = [None] * len(texts)
+        for batch in batches:
+            chunk = {
+                key: [values[i] for i in batch]
+                for key, values in encodings.items()
+            }
+            batcher.record_padding([lengths[i] for i in batch])
+            for i, result in zip(batch, self._forward(chunk)):
+                results[i] = result
+        return results
+
+    def _forward(self, encoded_chunk: dict) -> List[dict]:
+        """Run a chunk of tokenized inputs through the active backend and return a result per row"""
+        probabilities = self.backend.predict_proba(encoded_chunk)
+        return [self._format_result(probs) for probs in probabilities]
+
+    @staticmethod
+    def _format_result(probs: List[float]) -> dict:
+        """Convert a row of class probabilities into the prediction result dict"""
+        # Map class indices to labels (fixing the label mapping)
+        # Based on training: class 1 = spam, class 0 = not_spam
+        predicted_class = 1 if probs[1] > probs[0] else 0
+        label = "spam" if predicted_class == 1 else "not_spam"
+        return {
+            "prediction": label,
+            "confidence": probs[predicted_class],
+            "class_probabilities": {
+                "not_spam": probs[0],
+                "spam": probs[1]
+            }
+        }
 
 # Create a singleton instance
 model_service = ModelService()
\ No newline at end of file
@@ -0,0 +1,255 @@
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.models.prediction import Prediction, PredictionHourlyRollup
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+PARTITIONS = Gauge('prediction_partitions', 'Daily partitions attached to the predictions table')
+PARTITIONS_CREATED = Counter('prediction_partitions_created_total', 'Daily prediction partitions created')
+PARTITIONS_DROPPED = Counter('prediction_partitions_dropped_total', 'Prediction partitions dropped by the retention policy')
+ROLLUP_HOURS = Counter('prediction_rollup_hours_refreshed_total', 'Hourly rollup rows (hour x model version) recomputed')
+DEFAULT_ROWS_MOVED = Counter('prediction_default_rows_moved_total', 'Rows moved out of the DEFAULT partition into a new daily partition')
+DEFAULT_ROWS_EXPIRED = Counter('prediction_default_rows_expired_total', 'Rows deleted from the DEFAULT partition by the retention policy')
+
+TABLE = Prediction.__tablename__
+ROLLUP_TABLE = PredictionHourlyRollup.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+# Recompute whole hours from the raw rows; re-running over the same hours is idempotent
+ROLLUP_UPSERT = f"""
+INSERT INTO {ROLLUP_TABLE}
+    (hour, model_version, total_count, spam_count, ham_count,
+     confidence_sum, confidence_min, confidence_max, updated_at)
+SELECT date_trunc('hour', timestamp) AS hour,
+       coalesce(model_version, 'unknown'),
+       count(*),
+       count(*) FILTER (WHERE prediction),
+       count(*) FILTER (WHERE NOT prediction),
+       sum(confidence),
+       min(confidence),
+       max(confidence),
+       now()
+FROM {TABLE}
+WHERE timestamp >= :start AND timestamp < :end
+GROUP BY 1, 2
+ON CONFLICT (hour, model_version) DO UPDATE SET
+    total_count = EXCLUDED.total_count,
+    spam_count = EXCLUDED.spam_count,
+    ham_count = EXCLUDED.ham_count,
+    confidence_sum = EXCLUDED.confidence_sum,
+    confidence_min = EXCLUDED.confidence_min,
+    confidence_max = EXCLUDED.confidence_max,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def partition_name(day: date) -> str:
+    return f"{TABLE}_p{day:%Y%m%d}"
+
+
+def is_partitioned(conn) -> bool:
+    """True if the predictions table was created with declarative partitioning"""
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": TABLE}
+    ).scalar())
+
+
+def list_partitions(conn) -> List[str]:
+    """Names of the daily partitions currently attached, oldest first"""
+    names = conn.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:table)"),
+        {"table": TABLE}
+    ).scalars()
+    return sorted(name for name in names if _PARTITION_NAME.match(name))
+
+
+def has_default_partition(conn) -> bool:
+    return conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": DEFAULT_PARTITION}).scalar()
+
+
+class PartitionService:
+    """Maintains the daily partitions of ``predictions`` and its hourly rollup
+
+    ``ensure_partitions`` creates today's partition and ``days_ahead`` more so
+    inserts never wait on DDL; a DEFAULT partition catches anything outside
+    that window, and its rows move into a day's partition when that day is
+    created. ``drop_expired_partitions`` enforces retention by dropping
+    whole days, which is a catalog operation instead of a large DELETE;
+    expired rows left in DEFAULT are deleted in bounded batches.
+    ``refresh_rollup`` re-aggregates recent hours into
+    ``prediction_hourly_rollups``, which outlives the raw partitions.
+    """
+
+    def __init__(self, days_ahead: int = 7, retention_days: int = 90, rollup_lookback_hours: int = 3,
+                 delete_batch_size: int = 5000):
+        self.days_ahead = max(1, days_ahead)
+        self.retention_days = retention_days
+        self.rollup_lookback_hours = max(1, rollup_lookback_hours)
+        self.delete_batch_size = max(1, delete_batch_size)
+
+    def ensure_partitions(self, engine, today: Optional[date] = None) -> List[str]:
+        """Create any missing daily partitions from today through days_ahead; returns the new names"""
+        today = today or datetime.now().date()
+        with engine.begin() as conn:
+            if not is_partitioned(conn):
+                logger.warning(f"Table {TABLE} is not partitioned; run scripts/partition_predictions_table.py to migrate it")
+                return []
+            created = self.create_partitions(conn, today, today + timedelta(days=self.days_ahead))
+        if created:
+            logger.info(f"Created prediction partitions: {', '.join(created)}")
+        return created
+
+    @staticmethod
+    def create_partitions(conn, first_day: date, last_day: date) -> List[str]:
+        """Create the missing daily partitions for first_day..last_day (inclusive) and the DEFAULT partition"""
+        existing = set(list_partitions(conn))
+        has_default = has_default_partition(conn)
+        created = []
+        day = first_day
+        while day <= last_day:
+            name = partition_name(day)
+            if name not in existing:
+                # Postgres refuses to create a partition while DEFAULT holds rows in its range
+                moved = PartitionService._take_default_rows(conn, day, name) if has_default else 0
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                ))
+                if moved:
+                    conn.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {name}_moved"))
+                    conn.execute(text(f"DROP TABLE {name}_moved"))
+                    DEFAULT_ROWS_MOVED.inc(moved)
+                    logger.info(f"Moved {moved} rows from {DEFAULT_PARTITION} into {name}")
+                created.append(name)
+            day += timedelta(days=1)
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        PARTITIONS.set(len(existing) + len(created))
+        PARTITIONS_CREATED.inc(len(created))
+        return created
+
+    @staticmethod
+    def _take_default_rows(conn, day: date, name: str) -> int:
+        """Move DEFAULT's rows for day into a temp table {name}_moved; returns how many were moved"""
+        bounds = {"start": day, "end": day + timedelta(days=1)}
+        if not conn.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end)"
+        ), bounds).scalar():
+            return 0
+        # Attaching the partition locks DEFAULT anyway; taking it now keeps writers out between copy and delete
+        conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(
+            f"CREATE TEMP TABLE {name}_moved ON COMMIT DROP AS "
+            f"SELECT * FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"
+        ), bounds)
+        return conn.execute(text(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"
+        ), bounds).rowcount
+
+    def drop_expired_partitions(self, engine, today: Optional[date] = None) -> List[str]:
+        """Drop daily partitions that lie entirely before the retention window; returns the dropped names"""
+        if self.retention_days <= 0:
+            return []
+        cutoff = (today or datetime.now().date()) - timedelta(days=self.retention_days)
+        dropped = []
+        with engine.begin() as conn:
+            if not is_partitioned(conn):
+                return dropped
+            partitions = list_partitions(conn)
+            for name in partitions:
+                day = datetime.strptime(_PARTITION_NAME.match(name).group(1), "%Y%m%d").date()
+                if day >= cutoff:
+                    continue
+                # Make sure the rollup has the day before its raw rows go away
+                self.upsert_rollup(conn, datetime.combine(day, datetime.min.time()),
+                                   datetime.combine(day + timedelta(days=1), datetime.min.time()))
+                conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+            PARTITIONS.set(len(partitions) - len(dropped))
+        if dropped:
+            PARTITIONS_DROPPED.inc(len(dropped))
+            logger.info(f"Dropped prediction partitions older than {cutoff}: {', '.join(dropped)}")
+        return dropped
+
+    def expire_default_rows(self, engine, today: Optional[date] = None) -> int:
+        """Delete DEFAULT partition rows older than the retention window in batches; returns the rows deleted
+
+        Rows land in DEFAULT when no daily partition covered their day, so
+        dropping partitions never reaches them. Their hours are rolled up
+        first, then each batch commits on its own to keep locks and WAL
+        bursts short.
+        """
+        if self.retention_days <= 0:
+            return 0
+        cutoff = datetime.combine((today or datetime.now().date()) - timedelta(days=self.retention_days), datetime.min.time())
+        with engine.begin() as conn:
+            if not (is_partitioned(conn) and has_default_partition(conn)):
+                return 0
+            oldest = conn.execute(
+                text(f"SELECT min(timestamp) FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"), {"cutoff": cutoff}
+            ).scalar()
+            if oldest is None:
+                return 0
+            self.upsert_rollup(conn, oldest.replace(minute=0, second=0, microsecond=0), cutoff)
+
+        deleted = 0
+        while True:
+            with engine.begin() as conn:
+                batch = conn.execute(text(
+                    f"DELETE FROM {DEFAULT_PARTITION} WHERE ctid IN "
+                    f"(SELECT ctid FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff LIMIT :limit)"
+                ), {"cutoff": cutoff, "limit": self.delete_batch_size}).rowcount
+            deleted += batch
+            if batch < self.delete_batch_size:
+                break
+        DEFAULT_ROWS_EXPIRED.inc(deleted)
+        logger.info(f"Deleted {deleted} rows older than {cutoff:%Y-%m-%d} from {DEFAULT_PARTITION}")
+        return deleted
+
+    def refresh_rollup(self, engine, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        """Recompute hourly rollup rows for [start, end); defaults to the last rollup_lookback_hours
+
+        The lookback re-covers hours that were still receiving buffered writes
+        on the previous run. Returns the number of rollup rows written.
+        """
+        now = datetime.now()
+        end = end or now
+        start = start or now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=self.rollup_lookback_hours)
+        with engine.begin() as conn:
+            rows = self.upsert_rollup(conn, start, end)
+        ROLLUP_HOURS.inc(rows)
+        return rows
+
+    @staticmethod
+    def upsert_rollup(conn, start: datetime, end: datetime) -> int:
+        """Recompute the rollup rows for the whole hours in [start, end) on an open connection"""
+        return conn.execute(text(ROLLUP_UPSERT), {"start": start, "end": end}).rowcount
+
+    def run_maintenance(self, engine) -> dict:
+        """Create upcoming partitions, refresh the rollup and apply retention"""
+        created = self.ensure_partitions(engine)
+        rollup_rows = self.refresh_rollup(engine)
+        dropped = self.drop_expired_partitions(engine)
+        expired_default_rows = self.expire_default_rows(engine)
+        return {"created": created, "rollup_rows": rollup_rows, "dropped": dropped,
+                "expired_default_rows": expired_default_rows}
+
+
+# Global partition service instance
+partition_service = PartitionService(
+    days_ahead=settings.PREDICTION_PARTITION_DAYS_AHEAD,
+    retention_days=settings.PREDICTION_RETENTION_DAYS,
+    rollup_lookback_hours=settings.PREDICTION_ROLLUP_LOOKBACK_HOURS,
+    delete_batch_size=settings.PREDICTION_RETENTION_DELETE_BATCH
+)
@@ -0,0 +1,158 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+BUFFERED = Gauge('prediction_write_buffer_size', 'Predictions waiting in the write-behind buffer')
+DROPPED = Counter('prediction_write_buffer_dropped_total', 'Predictions never written to the database', ['reason'])
+WRITTEN = Counter('prediction_write_buffer_written_total', 'Predictions flushed to the database')
+FLUSH_SIZE = Histogram(
+    'prediction_write_flush_size',
+    'Predictions written per flush',
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500)
+)
+FLUSH_DURATION = Histogram(
+    'prediction_write_flush_seconds',
+    'Time spent writing one flush to the database',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+
+def _save_rows(rows: List[dict]) -> int:
+    """Write rows with the bulk insert path in a short-lived session"""
+    from app.core.database import SessionLocal
+    from app.services.db_service import db_service
+
+    db = SessionLocal()
+    try:
+        return db_service.save_predictions(db, rows)
+    finally:
+        db.close()
+
+
+class PredictionWriteBuffer:
+    """Write-behind buffer that batches prediction rows into bulk inserts
+
+    Request handlers ``submit`` rows and return immediately; a background
+    thread flushes them with one transaction per batch once ``batch_size``
+    rows are waiting or ``flush_interval_s`` has passed. The buffer holds at
+    most ``max_size`` rows; when full, ``overflow_policy`` drops either the
+    oldest buffered row or the incoming one. ``stop`` drains what is left.
+    """
+
+    def __init__(self, save_fn: Callable[[List[dict]], int] = _save_rows, max_size: int = 10000,
+                 batch_size: int = 500, flush_interval_s: float = 1.0, overflow_policy: str = "drop_oldest"):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}")
+        self.save_fn = save_fn
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.01, flush_interval_s)
+        self.overflow_policy = overflow_policy
+        self._rows = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background flush thread"""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="prediction-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"Prediction write buffer started (batch_size={self.batch_size}, "
+                    f"flush_interval_s={self.flush_interval}, max_size={self.max_size})")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop accepting rows, flush everything still buffered and join the thread"""
+        if not self.running:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Prediction write buffer did not drain within {timeout}s; {len(self._rows)} rows lost")
+        self._thread = None
+
+    def submit(self, row: dict) -> bool:
+        """Buffer one prediction row; returns False if it was dropped"""
+        return self.submit_many([row]) == 1
+
+    def submit_many(self, rows: List[dict]) -> int:
+        """Buffer several rows; returns how many were accepted"""
+        accepted = 0
+        with self._condition:
+            if self._stopping:
+                DROPPED.labels(reason="stopped").inc(len(rows))
+                return 0
+            for row in rows:
+                if len(self._rows) >= self.max_size:
+                    DROPPED.labels(reason="overflow").inc()
+                    if self.overflow_policy == "drop_newest":
+                        continue
+                    self._rows.popleft()
+                self._rows.append(row)
+                accepted += 1
+            BUFFERED.set(len(self._rows))
+            if len(self._rows) >= self.batch_size:
+                self._condition.notify()
+        return accepted
+
+    def _take_batch(self) -> List[dict]:
+        """Wait for a full batch, the flush interval or shutdown, then pop up to batch_size rows"""
+        with self._condition:
+            deadline = time.monotonic() + self.flush_interval
+            while not self._stopping and len(self._rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+            BUFFERED.set(len(self._rows))
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._flush(batch)
+            with self._condition:
+                if self._stopping and not self._rows:
+                    return
+
+    def _flush(self, batch: List[dict]):
+        started = time.perf_counter()
+        try:
+            self.save_fn(batch)
+        except Exception as e:
+            DROPPED.labels(reason="error").inc(len(batch))
+            logger.error(f"Failed to write {len(batch)} buffered predictions: {str(e)}")
+            return
+        FLUSH_DURATION.observe(time.perf_counter() - started)
+        FLUSH_SIZE.observe(len(batch))
+        WRITTEN.inc(len(batch))
+
+
+# Global write-behind buffer for the API process
+prediction_writer = PredictionWriteBuffer(
+    max_size=settings.PREDICTION_WRITE_BUFFER_MAX_SIZE,
+    batch_size=settings.PREDICTION_WRITE_BATCH_SIZE,
+    flush_interval_s=settings.PREDICTION_WRITE_FLUSH_INTERVAL_S,
+    overflow_policy=settings.PREDICTION_WRITE_OVERFLOW_POLICY
+)
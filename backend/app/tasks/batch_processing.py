@@ -1,14 +1,26 @@
 from celery import shared_task
 from app.services.model_service import model_service
 from app.services.db_service import db_service
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import SessionLocal
 import logging
 from uuid import uuid4
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+def persist_predictions(rows: list) -> int:
+    """Save a batch of predictions in one transaction; returns how many were stored"""
+    if not rows:
+        return 0
+    db = SessionLocal()
+    try:
+        return db_service.save_predictions(db, rows)
+    except Exception as e:
+        logger.warning(f"Failed to persist batch predictions: {str(e)}")
+        return 0
+    finally:
+        db.close()
+
 @shared_task(bind=True)
 def process_batch_prediction(self, sms_texts: list) -> dict:
     """
@@ -24,49 +36,54 @@ def process_batch_prediction(self, sms_texts: list) -> dict:
         logger.info(f"Starting batch processing for {len(sms_texts)} SMS messages")
         
         results = []
+        rows = []
         processed_count = 0
         
-        # Process each SMS text
-        for i, sms_text in enumerate(sms_texts):
-            try:
-                # Update task progress
-                self.update_state(
-                    state='PROGRESS',
-                    meta={'current': i, 'total': len(sms_texts)}
-                )
-                
-                # Get prediction from model
-                result = model_service.predict(sms_text)
-                
-                # Convert result to match schema
-                is_spam = result["prediction"] == "spam"
-                confidence = result["confidence"]
-                
-                # Create prediction data
-                prediction_data = {
-                    "id": str(uuid4()),
-                    "sms_text": sms_text,
-                    "prediction": is_spam,
-                    "confidence": confidence,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                results.append(prediction_data)
-                processed_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing SMS {i}: {str(e)}")
+        self.update_state(
+            state='PROGRESS',
+            meta={'current': 0, 'total': len(sms_texts)}
+        )
+        
+        # Get predictions for the whole batch in chunked forward passes
+        try:
+            model_results = model_service.predict_many(sms_texts)
+        except Exception as e:
+            logger.error(f"Batched inference failed: {str(e)}")
+            model_results = [e] * len(sms_texts)
+        
+        # Convert each result to match schema
+        for sms_text, result in zip(sms_texts, model_results):
+            if isinstance(result, Exception):
                 results.append({
                     "sms_text": sms_text,
-                    "error": str(e),
+                    "error": str(result),
                     "timestamp": datetime.now().isoformat()
                 })
+                continue
+            
+            is_spam = result["prediction"] == "spam"
+            confidence = result["confidence"]
+            
+            # Create prediction data
+            row = {
+                "id": uuid4(),
+                "sms_text": sms_text,
+                "prediction": is_spam,
+                "confidence": confidence,
+                "timestamp": datetime.now(),
+                "model_version": model_service.model_version
+            }
+            rows.append(row)
+            
+            results.append(dict(row, id=str(row["id"]), timestamp=row["timestamp"].isoformat()))
+            processed_count += 1
         
         logger.info(f"Batch processing completed. Processed {processed_count}/{len(sms_texts)} messages")
         
         return {
             "status": "completed",
             "processed_count": processed_count,
+            "persisted_count": persist_predictions(rows),
             "total_count": len(sms_texts),
             "results": results
         }
@@ -106,7 +123,8 @@ def process_single_prediction(sms_text: str) -> dict:
             "prediction": is_spam,
             "confidence": confidence,
             "class_probabilities": result["class_probabilities"],
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "model_version": model_service.model_version
         }
         
     except Exception as e:
@@ -0,0 +1,26 @@
+from celery import shared_task
+from app.core.database import engine
+from app.services.partition_service import partition_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def maintain_prediction_partitions() -> dict:
+    """
+    Create upcoming predictions partitions, refresh the hourly rollup and
+    drop partitions (and DEFAULT partition rows) past the retention window
+    
+    Scheduled by Celery beat every PREDICTION_MAINTENANCE_INTERVAL_S; every
+    step is idempotent, so overlapping or repeated runs are harmless.
+    
+    Returns:
+        Dictionary with the partitions created and dropped, rollup rows written and DEFAULT rows expired
+    """
+    try:
+        result = partition_service.run_maintenance(engine)
+        logger.info(f"Partition maintenance completed: {result}")
+        return dict(result, status="completed")
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {str(e)}")
+        return {"status": "failed", "error": str(e)}
@@ -0,0 +1,161 @@
+import json
+import logging
+from typing import Optional, Any, Awaitable, Callable, Dict, List
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.utils.redis_client import (RELEASE_LOCK_SCRIPT, REDIS_FAILURES, REDIS_POOL_EXHAUSTED, REDIS_SHORT_CIRCUITED,
+                                    CircuitBreaker, is_pool_exhausted, redis_client)
+
+logger = logging.getLogger(__name__)
+
+class AsyncRedisClient:
+    """asyncio-native counterpart of RedisClient for the FastAPI request path
+
+    Exposes the same get/set/exists/delete and bulk surface, so cache hits
+    are awaited on the event loop instead of occupying an I/O thread.
+    Health is shared with the sync client: failures feed the same circuit
+    breaker and its background reconnect closes it again. Connections are
+    created lazily on the running loop; Celery workers keep using the sync
+    client.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, on_circuit_open: Callable[[], None]):
+        self.breaker = breaker
+        self.on_circuit_open = on_circuit_open
+        pool_kwargs = dict(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT_S,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_S,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_S
+        )
+        self.client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(decode_responses=True, **pool_kwargs))
+        self.raw_client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(decode_responses=False, **pool_kwargs))
+
+    @property
+    def connected(self) -> bool:
+        return not self.breaker.is_open
+
+    async def _run(self, action: str, default: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await a Redis call through the shared circuit breaker, returning ``default`` on failure"""
+        if not self.connected:
+            REDIS_SHORT_CIRCUITED.inc()
+            # No-op while this process's reconnect thread runs; starts one in a worker forked with the circuit open
+            self.on_circuit_open()
+            return default
+        try:
+            result = await call()
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            if is_pool_exhausted(e):
+                # Every pooled connection is busy; Redis itself is fine, so leave the breaker alone
+                REDIS_POOL_EXHAUSTED.inc()
+                logger.warning(f"Failed to {action} in Redis: {str(e)}")
+                return default
+            REDIS_FAILURES.inc()
+            logger.error(f"Failed to {action} in Redis: {str(e)}")
+            if self.breaker.record_failure():
+                logger.error("Redis circuit opened; failing fast until it reconnects")
+                self.on_circuit_open()
+            return default
+        except Exception as e:
+            logger.error(f"Failed to {action} in Redis: {str(e)}")
+            return default
+        self.breaker.record_success()
+        return result
+
+    async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
+        """Set a key-value pair in Redis with expiration"""
+        return bool(await self._run("set key", False, lambda: self.client.setex(key, expire, json.dumps(value))))
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value from Redis by key"""
+        value = await self._run("get key", None, lambda: self.client.get(key))
+        if not value:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError as e:
+            logger.error(f"Failed to decode value from Redis: {str(e)}")
+            return None
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round trip; missing keys come back as None"""
+        if not keys:
+            return []
+        values = await self._run("get keys", None, lambda: self.client.mget(keys))
+        if values is None:
+            return [None] * len(keys)
+        try:
+            return [json.loads(value) if value else None for value in values]
+        except ValueError as e:
+            logger.error(f"Failed to decode values from Redis: {str(e)}")
+            return [None] * len(keys)
+
+    async def set_many(self, items: Dict[str, Any], expire: int = 3600) -> bool:
+        """Set several key-value pairs with expiration in one pipelined round trip"""
+        if not items:
+            return True
+        encoded = {key: json.dumps(value) for key, value in items.items()}
+        return await self._run("set keys", False, lambda: self._pipeline_setex(self.client, encoded, expire))
+
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Get a value as raw bytes"""
+        return await self._run("get key", None, lambda: self.raw_client.get(key))
+
+    async def mget_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Get several values as raw bytes in one round trip"""
+        if not keys:
+            return []
+        values = await self._run("get keys", None, lambda: self.raw_client.mget(keys))
+        return values if values is not None else [None] * len(keys)
+
+    async def set_raw(self, key: str, value: bytes, expire: int = 3600, keep_ttl: bool = False) -> bool:
+        """Set a raw bytes value; ``keep_ttl`` rewrites it without touching the existing expiry"""
+        if keep_ttl:
+            return bool(await self._run("set key", False, lambda: self.raw_client.set(key, value, keepttl=True, xx=True)))
+        return bool(await self._run("set key", False, lambda: self.raw_client.setex(key, expire, value)))
+
+    async def set_many_raw(self, items: Dict[str, bytes], expire: int = 3600) -> bool:
+        """Set several raw bytes values with expiration in one pipelined round trip"""
+        if not items:
+            return True
+        return await self._run("set keys", False, lambda: self._pipeline_setex(self.raw_client, items, expire))
+
+    @staticmethod
+    async def _pipeline_setex(client, items: Dict[str, Any], expire: int) -> bool:
+        pipe = client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(key, expire, value)
+        return all(await pipe.execute())
+
+    async def acquire_lock(self, key: str, token: str, ttl_ms: int) -> bool:
+        """Take a short-lived lock (SET NX PX); only the holder's token can release it"""
+        return bool(await self._run("acquire lock", False, lambda: self.client.set(key, token, nx=True, px=ttl_ms)))
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release a lock taken with acquire_lock if it is still held by ``token``"""
+        return bool(await self._run("release lock", False, lambda: self.client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)))
+
+    async def delete(self, key: str) -> bool:
+        """Delete a key from Redis"""
+        return await self._run("delete key", 0, lambda: self.client.delete(key)) > 0
+
+    async def exists(self, key: str) -> bool:
+        """Check if a key exists in Redis"""
+        return await self._run("check key existence", 0, lambda: self.client.exists(key)) > 0
+
+    async def close(self):
+        """Close pooled connections (call on application shutdown)"""
+        for client in (self.client, self.raw_client):
+            try:
+                await client.connection_pool.disconnect()
+            except Exception as e:
+                logger.warning(f"Error closing async Redis client: {str(e)}")
+
+# Create a singleton instance sharing the sync client's circuit breaker and reconnect loop
+async_redis_client = AsyncRedisClient(redis_client.breaker, redis_client.start_reconnect)
@@ -0,0 +1,97 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics, labelled by cache tier ("local" or "redis")
+CACHE_LOOKUPS = Counter('prediction_cache_lookups_total', 'Prediction cache lookups', ['tier', 'result'])
+CACHE_EVICTIONS = Counter('prediction_cache_evictions_total', 'Entries dropped from the in-process cache', ['reason'])
+LOCAL_CACHE_SIZE = Gauge('prediction_cache_local_entries', 'Entries held in the in-process cache')
+
+
+class LocalTTLCache:
+    """Bounded, thread-safe in-process LRU cache with per-entry TTL
+
+    Sits in front of Redis so the hottest repeated messages are answered
+    without a network round trip. Least recently used entries are evicted once
+    ``max_entries`` is reached; expired entries are dropped when read.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0, record_metrics: bool = True):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.record_metrics = record_metrics
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self._record_lookup("hit")
+                    return value
+                del self._entries[key]
+                self._record_eviction("expired")
+            self.misses += 1
+        self._record_lookup("miss")
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries if full"""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._record_eviction("capacity")
+            self._record_size()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None
+            self._record_size()
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._record_size()
+
+    def _record_lookup(self, result: str):
+        if self.record_metrics:
+            CACHE_LOOKUPS.labels(tier="local", result=result).inc()
+
+    def _record_eviction(self, reason: str):
+        # Called with the lock held
+        self.evictions += 1
+        if self.record_metrics:
+            CACHE_EVICTIONS.labels(reason=reason).inc()
+        self._record_size()
+
+    def _record_size(self):
+        if self.record_metrics:
+            LOCAL_CACHE_SIZE.set(len(self._entries))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
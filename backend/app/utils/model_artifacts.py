@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+import struct
+import logging
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger(__name__)
+
+MERGED_WEIGHTS_FILE = "model.safetensors"
+
+# safetensors dtype tags mapped to torch dtype names
+_SAFETENSORS_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+def is_merged_artifact(path: str) -> bool:
+    """Check whether a directory holds an exported merged model"""
+    return bool(path) and os.path.exists(os.path.join(path, MERGED_WEIGHTS_FILE)) \
+        and os.path.exists(os.path.join(path, "config.json"))
+
+
+def export_merged_model(model, tokenizer, output_dir: str) -> str:
+    """Write a merged, inference-ready model as a single safetensors file plus tokenizer
+
+    Args:
+        model: Sequence classification model with adapters already merged
+        tokenizer: Tokenizer used by the model
+        output_dir: Directory to write the artifact to
+
+    Returns:
+        Path to the written weights file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # Saved with the config so artifacts load ready for padded batches
+    model.config.pad_token_id = tokenizer.pad_token_id
+    # A single shard keeps the weights in one file that can be mapped in one go
+    model.save_pretrained(output_dir, safe_serialization=True, max_shard_size="100GB")
+    tokenizer.save_pretrained(output_dir)
+    weights_path = os.path.join(output_dir, MERGED_WEIGHTS_FILE)
+    logger.info(f"Merged model exported to {weights_path} ({os.path.getsize(weights_path) / 1e9:.2f} GB)")
+    return weights_path
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, "torch.Tensor"]:
+    """Load a safetensors file as tensors that view a private memory map of the file
+
+    The file is mapped copy-on-write, so processes on the same host that only
+    read the weights share the same page-cache pages instead of each holding a
+    private copy.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+
+    file_size = os.path.getsize(path)
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=file_size)
+    buffer = torch.empty(0, dtype=torch.uint8).set_(storage, 0, (file_size,), (1,))
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        raw = buffer[data_start + start:data_start + end]
+        tensors[name] = raw.view(dtype).view(info["shape"])
+    return tensors
+
+
+def load_merged_model(path: str):
+    """Build a sequence classification model from an exported artifact without copying its weights
+
+    The module skeleton is created without weight initialisation, then every
+    parameter is swapped for a view into the memory-mapped weights file.
+    """
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+    from transformers.modeling_utils import no_init_weights
+
+    config = AutoConfig.from_pretrained(path)
+    state_dict = load_safetensors_mmap(os.path.join(path, MERGED_WEIGHTS_FILE))
+    dtype = next(iter(state_dict.values())).dtype
+
+    with no_init_weights():
+        model = AutoModelForSequenceClassification.from_config(config, torch_dtype=dtype)
+    model.load_state_dict(state_dict, strict=True, assign=True)
+    model.eval()
+    return model
+
+
+def artifact_fingerprint(path: str, sample_bytes: int = 1 << 20) -> str:
+    """Short, stable fingerprint of a model directory or file
+
+    Hashes every file's relative name and size plus its first and last
+    ``sample_bytes``, so multi-GB weights fingerprint in milliseconds while a
+    retrained adapter or re-exported model always gets a new value.
+    """
+    if not path:
+        raise OSError("No model artifact path to fingerprint")
+    if os.path.isfile(path):
+        root, files = os.path.dirname(path), [os.path.basename(path)]
+    else:
+        root = path
+        files = sorted(
+            os.path.relpath(os.path.join(directory, name), root)
+            for directory, subdirs, names in os.walk(path)
+            for name in names
+            if not name.startswith(".")
+        )
+    if not files:
+        raise OSError(f"No files to fingerprint in {path}")
+
+    digest = hashlib.sha256()
+    for name in files:
+        file_path = os.path.join(root, name)
+        size = os.path.getsize(file_path)
+        digest.update(f"{name}\0{size}\0".encode("utf-8"))
+        with open(file_path, "rb") as f:
+            digest.update(f.read(sample_bytes))
+            if size > 2 * sample_bytes:
+                f.seek(-sample_bytes, os.SEEK_END)
+                digest.update(f.read(sample_bytes))
+    return digest.hexdigest()[:12]
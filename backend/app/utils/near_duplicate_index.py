@@ -0,0 +1,159 @@
+import re
+import sys
+import time
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+NEAR_DUP_LOOKUPS = Counter('near_duplicate_lookups_total', 'Near-duplicate index lookups', ['result'])
+NEAR_DUP_VERIFICATIONS = Counter('near_duplicate_verifications_total', 'Near-duplicate hits re-checked against the model')
+NEAR_DUP_FALSE_AGREEMENTS = Counter('near_duplicate_false_agreements_total', 'Re-checked near-duplicate hits whose verdict differed from the model')
+NEAR_DUP_ENTRIES = Gauge('near_duplicate_index_entries', 'Messages held in the near-duplicate index')
+NEAR_DUP_BYTES = Gauge('near_duplicate_index_bytes', 'Approximate memory held by the near-duplicate index')
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WHITESPACE = re.compile(r"\s+")
+_DIGIT = re.compile(r"\d")
+
+
+class MinHashLSHIndex:
+    """MinHash LSH index over character shingles of recently classified messages
+
+    Each message gets a ``num_perm``-value MinHash signature, split into
+    ``bands`` bands for bucketing. A query only compares against messages
+    sharing at least one band bucket and returns the stored verdict of the most
+    similar one if its estimated Jaccard similarity reaches ``threshold``.
+    Entries expire after ``ttl`` seconds and the oldest are evicted beyond
+    ``max_entries``.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 5, max_entries: int = 50000, ttl: float = 3600.0, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+        self._entries = OrderedDict()  # entry id -> (expires_at, signature, result)
+        self._buckets = [dict() for _ in range(bands)]  # band -> band key -> set of entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.verifications = 0
+        self.false_agreements = 0
+
+    def _signature(self, text: str) -> np.ndarray:
+        # Campaign variants mostly differ in case, spacing and digits (phone numbers, codes, amounts)
+        text = _WHITESPACE.sub(" ", _DIGIT.sub("0", text.casefold())).strip()
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)
+        # Universal hashing (a*x + b) mod p, one permutation per column; uint64 overflow is intended
+        permuted = np.bitwise_and((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME, _MAX_HASH)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def query(self, text: str) -> Optional[dict]:
+        """Return the verdict of the most similar recent message, or None below the threshold"""
+        signature = self._signature(text)
+        now = time.monotonic()
+        best_similarity, best_result = 0.0, None
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            for entry_id in candidates:
+                expires_at, candidate_signature, result = self._entries[entry_id]
+                if expires_at <= now:
+                    continue
+                similarity = float(np.mean(candidate_signature == signature))
+                if similarity > best_similarity:
+                    best_similarity, best_result = similarity, result
+
+            if best_result is not None and best_similarity >= self.threshold:
+                self.hits += 1
+                NEAR_DUP_LOOKUPS.labels(result="hit").inc()
+                return best_result
+            self.misses += 1
+        NEAR_DUP_LOOKUPS.labels(result="miss").inc()
+        return None
+
+    def add(self, text: str, result: dict):
+        """Index a freshly classified message"""
+        signature = self._signature(text)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (time.monotonic() + self.ttl, signature, result)
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, set()).add(entry_id)
+            self._evict()
+            self._record_size()
+
+    def record_verification(self, agreed: bool):
+        """Record whether a near-duplicate verdict matched the model's own prediction"""
+        with self._lock:
+            self.verifications += 1
+            if not agreed:
+                self.false_agreements += 1
+        NEAR_DUP_VERIFICATIONS.inc()
+        if not agreed:
+            NEAR_DUP_FALSE_AGREEMENTS.inc()
+
+    def _evict(self):
+        """Drop expired entries from the front and anything beyond max_entries (lock held)"""
+        now = time.monotonic()
+        while self._entries:
+            entry_id, (expires_at, signature, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and expires_at > now:
+                break
+            del self._entries[entry_id]
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket = self._buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+
+    def _record_size(self):
+        NEAR_DUP_ENTRIES.set(len(self._entries))
+        NEAR_DUP_BYTES.set(self.approximate_bytes())
+
+    def approximate_bytes(self) -> int:
+        """Rough memory estimate: signatures, bucket keys and set slots, plus stored verdicts"""
+        entries = len(self._entries)
+        signature_bytes = self.num_perm * 4 + 112
+        bucket_bytes = self.bands * (sys.getsizeof(b"") + self.rows * 4 + 64)
+        result_bytes = 400
+        return entries * (signature_bytes + bucket_bytes + result_bytes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "false_agreement_rate": self.false_agreements / self.verifications if self.verifications else 0.0,
+                "approximate_bytes": self.approximate_bytes()
+            }
@@ -0,0 +1,92 @@
+import json
+import struct
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Binary cache record layout (little endian):
+#   magic (B) | format version (B) | flags (B) | label index (B) | model tag (I) | not_spam prob | spam prob
+# Probabilities are float32, or float16 when FLAG_FLOAT16 is set: 16 or 12 bytes per record
+# versus ~110 bytes for the JSON dict.
+RECORD_MAGIC = 0xB5
+RECORD_VERSION = 1
+FLAG_FLOAT16 = 0x01
+FLAG_NEAR_DUPLICATE = 0x02
+FLAG_CASCADE = 0x04
+
+_HEADER = struct.Struct("<BBBBI")
+_PROBS_32 = struct.Struct("<ff")
+_PROBS_16 = struct.Struct("<ee")
+
+LABELS = ("not_spam", "spam")
+
+
+class PredictionCodec:
+    """Encodes prediction results as compact binary cache records
+
+    ``model_tag`` identifies the model that produced a record; records with a
+    different tag decode to None so a model swap never serves stale verdicts.
+    Legacy JSON records are still decoded so existing keys keep working until
+    they expire; ModelService rewrites them in the binary format when read.
+    """
+
+    def __init__(self, model_tag: int = 0, float16: bool = False):
+        self.model_tag = model_tag & 0xFFFFFFFF
+        self.float16 = float16
+
+    def encode(self, result: dict) -> bytes:
+        probs = result["class_probabilities"]
+        flags = FLAG_FLOAT16 if self.float16 else 0
+        if result.get("near_duplicate"):
+            flags |= FLAG_NEAR_DUPLICATE
+        if result.get("stage") == "cascade":
+            flags |= FLAG_CASCADE
+        label_index = LABELS.index(result["prediction"])
+        body = (_PROBS_16 if self.float16 else _PROBS_32).pack(probs["not_spam"], probs["spam"])
+        return _HEADER.pack(RECORD_MAGIC, RECORD_VERSION, flags, label_index, self.model_tag) + body
+
+    def decode(self, raw: Optional[bytes]) -> Optional[dict]:
+        """Decode a binary or legacy JSON record; None if missing, unreadable or from another model"""
+        if not raw:
+            return None
+        if raw[0] != RECORD_MAGIC:
+            return self._decode_json(raw)
+        try:
+            _, version, flags, label_index, model_tag = _HEADER.unpack_from(raw)
+            if version != RECORD_VERSION or model_tag != self.model_tag:
+                return None
+            if label_index >= len(LABELS):
+                logger.warning(f"Unreadable cache record: label index {label_index}")
+                return None
+            probs = (_PROBS_16 if flags & FLAG_FLOAT16 else _PROBS_32).unpack_from(raw, _HEADER.size)
+        except struct.error as e:
+            logger.warning(f"Unreadable cache record: {e}")
+            return None
+
+        result = {
+            "prediction": LABELS[label_index],
+            "confidence": probs[label_index],
+            "class_probabilities": {
+                "not_spam": probs[0],
+                "spam": probs[1]
+            }
+        }
+        if flags & FLAG_NEAR_DUPLICATE:
+            result["near_duplicate"] = True
+        if flags & FLAG_CASCADE:
+            result["stage"] = "cascade"
+        return result
+
+    @staticmethod
+    def is_legacy(raw: Optional[bytes]) -> bool:
+        """True for records written in the old JSON format"""
+        return bool(raw) and raw[0] != RECORD_MAGIC
+
+    @staticmethod
+    def _decode_json(raw: bytes) -> Optional[dict]:
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            logger.warning(f"Unreadable cache record: {e}")
+            return None
@@ -1,85 +1,302 @@
+import os
 import redis
 import json
+import time
 import logging
+import threading
 from app.core.config import settings
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Dict, List
+from prometheus_client import Counter, Gauge
 
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics
+REDIS_CIRCUIT_OPEN = Gauge('redis_circuit_open', 'Whether the Redis circuit breaker is open (1) or closed (0)')
+REDIS_CIRCUIT_OPENS = Counter('redis_circuit_opens_total', 'Times the Redis circuit breaker opened')
+REDIS_FAILURES = Counter('redis_call_failures_total', 'Redis calls that failed with a connection or timeout error')
+REDIS_SHORT_CIRCUITED = Counter('redis_calls_short_circuited_total', 'Redis calls skipped because the circuit was open')
+REDIS_RECONNECT_ATTEMPTS = Counter('redis_reconnect_attempts_total', 'Background Redis reconnect attempts', ['result'])
+REDIS_POOL_EXHAUSTED = Counter('redis_pool_exhausted_total', 'Redis calls that found no free pooled connection within REDIS_POOL_TIMEOUT_S')
+REDIS_POOL_CONNECTIONS = Gauge('redis_pool_connections', 'Connections in the Redis client pools', ['pool', 'state'])
+
+# Delete a lock only if it still holds our token, so an expired lock re-taken by another process survives
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+def is_pool_exhausted(error: Exception) -> bool:
+    """True for BlockingConnectionPool's checkout timeout, which means local saturation rather than Redis being down"""
+    return isinstance(error, redis.exceptions.ConnectionError) and "No connection available" in str(error)
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and stays open until reset
+
+    While open, callers fail fast instead of each waiting for a socket
+    timeout; RedisClient's background reconnect closes it again.
+    """
+
+    def __init__(self, failure_threshold: int):
+        self.failure_threshold = max(1, failure_threshold)
+        self.failures = 0
+        self.is_open = False
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this failure opened the circuit"""
+        with self._lock:
+            self.failures += 1
+            if self.is_open or self.failures < self.failure_threshold:
+                return False
+            self.is_open = True
+        REDIS_CIRCUIT_OPEN.set(1)
+        REDIS_CIRCUIT_OPENS.inc()
+        return True
+
+    def trip(self):
+        """Open the circuit immediately (e.g. Redis unreachable at startup)"""
+        with self._lock:
+            self.is_open = True
+        REDIS_CIRCUIT_OPEN.set(1)
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.is_open = False
+        REDIS_CIRCUIT_OPEN.set(0)
+
 class RedisClient:
     def __init__(self):
         self.client = None
-        self.connected = False
+        self.raw_client = None
+        self.breaker = CircuitBreaker(settings.REDIS_BREAKER_FAILURE_THRESHOLD)
+        self._reconnect_lock = threading.Lock()
+        self._reconnect_pid = None
         self._connect()
-    
+
+    @property
+    def connected(self) -> bool:
+        """True while calls are allowed through (pools exist and the circuit is closed)"""
+        return self.client is not None and not self.breaker.is_open
+
     def _connect(self):
-        """Initialize Redis connection"""
+        """Create the bounded connection pools and check that Redis answers"""
+        pool_kwargs = dict(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT_S,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_S,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_S,
+            health_check_interval=30
+        )
+        # Callers wait up to REDIS_POOL_TIMEOUT_S for a free connection instead of opening unbounded sockets
+        self.client = redis.Redis(connection_pool=redis.BlockingConnectionPool(decode_responses=True, **pool_kwargs))
+        # Bytes-mode connection for binary cache records (no str decoding on read)
+        self.raw_client = redis.Redis(connection_pool=redis.BlockingConnectionPool(decode_responses=False, **pool_kwargs))
+        self._export_pool_metrics("text", self.client.connection_pool)
+        self._export_pool_metrics("bytes", self.raw_client.connection_pool)
         try:
-            self.client = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                db=settings.REDIS_DB,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            # Test connection
             self.client.ping()
-            self.connected = True
             logger.info("Redis connection established successfully")
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {str(e)}")
-            self.connected = False
-    
-    def set(self, key: str, value: Any, expire: int = 3600) -> bool:
-        """Set a key-value pair in Redis with expiration"""
-        if not self.connected or not self.client:
-            return False
-            
+            self.breaker.trip()
+            self.start_reconnect()
+
+    @staticmethod
+    def _export_pool_metrics(name: str, pool):
+        def created() -> int:
+            return len(getattr(pool, "_connections", ()))
+
+        def idle() -> int:
+            # BlockingConnectionPool keeps idle connections (and None placeholders) in a queue
+            queue = getattr(pool, "pool", None)
+            return sum(1 for conn in getattr(queue, "queue", ()) if conn is not None)
+
+        REDIS_POOL_CONNECTIONS.labels(pool=name, state="created").set_function(created)
+        REDIS_POOL_CONNECTIONS.labels(pool=name, state="in_use").set_function(lambda: created() - idle())
+        REDIS_POOL_CONNECTIONS.labels(pool=name, state="max").set(pool.max_connections)
+
+    def start_reconnect(self):
+        """Ping Redis from a background thread with exponential backoff until it answers"""
+        with self._reconnect_lock:
+            # A forked worker does not inherit the parent's thread, so track the owning process
+            if self._reconnect_pid == os.getpid():
+                return
+            self._reconnect_pid = os.getpid()
+        threading.Thread(target=self._reconnect_loop, name="redis-reconnect", daemon=True).start()
+
+    def _reconnect_loop(self):
+        backoff = settings.REDIS_RECONNECT_BACKOFF_S
+        while True:
+            time.sleep(backoff)
+            try:
+                self.client.ping()
+            except Exception as e:
+                REDIS_RECONNECT_ATTEMPTS.labels(result="failure").inc()
+                backoff = min(backoff * 2, settings.REDIS_RECONNECT_MAX_BACKOFF_S)
+                logger.warning(f"Redis still unavailable ({str(e)}); retrying in {backoff:.1f}s")
+                continue
+            REDIS_RECONNECT_ATTEMPTS.labels(result="success").inc()
+            with self._reconnect_lock:
+                self._reconnect_pid = None
+                self.breaker.reset()
+            logger.info("Redis connection re-established; circuit closed")
+            return
+
+    def _run(self, action: str, default: Any, fn: Callable, *args, **kwargs) -> Any:
+        """Run a Redis call through the circuit breaker, returning ``default`` on failure"""
+        if not self.connected:
+            REDIS_SHORT_CIRCUITED.inc()
+            if self.client is not None and self._reconnect_pid != os.getpid():
+                # Forked with the circuit open: this process has no reconnect thread of its own yet
+                self.start_reconnect()
+            return default
         try:
-            serialized_value = json.dumps(value)
-            result = self.client.setex(key, expire, serialized_value)
-            return result
+            result = fn(*args, **kwargs)
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            if is_pool_exhausted(e):
+                # Every pooled connection is busy; Redis itself is fine, so leave the breaker alone
+                REDIS_POOL_EXHAUSTED.inc()
+                logger.warning(f"Failed to {action} in Redis: {str(e)}")
+                return default
+            REDIS_FAILURES.inc()
+            logger.error(f"Failed to {action} in Redis: {str(e)}")
+            if self.breaker.record_failure():
+                logger.error("Redis circuit opened; failing fast until it reconnects")
+                self.start_reconnect()
+            return default
         except Exception as e:
-            logger.error(f"Failed to set key in Redis: {str(e)}")
-            return False
-    
+            logger.error(f"Failed to {action} in Redis: {str(e)}")
+            return default
+        self.breaker.record_success()
+        return result
+
+    def set(self, key: str, value: Any, expire: int = 3600) -> bool:
+        """Set a key-value pair in Redis with expiration"""
+        return self._run("set key", False, self.client.setex, key, expire, json.dumps(value))
+
     def get(self, key: str) -> Optional[Any]:
         """Get a value from Redis by key"""
-        if not self.connected or not self.client:
+        value = self._run("get key", None, self.client.get, key)
+        if not value:
             return None
-            
         try:
-            value = self.client.get(key)
-            if value:
-                return json.loads(value)
+            return json.loads(value)
+        except ValueError as e:
+            logger.error(f"Failed to decode value from Redis: {str(e)}")
             return None
+
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round trip; missing keys come back as None"""
+        if not keys:
+            return []
+        values = self._run("get keys", None, self.client.mget, keys)
+        if values is None:
+            return [None] * len(keys)
+        try:
+            return [json.loads(value) if value else None for value in values]
+        except ValueError as e:
+            logger.error(f"Failed to decode values from Redis: {str(e)}")
+            return [None] * len(keys)
+
+    def set_many(self, items: Dict[str, Any], expire: int = 3600) -> bool:
+        """Set several key-value pairs with expiration in one pipelined round trip"""
+        if not items:
+            return True
+        return self._run("set keys", False, self._pipeline_setex, self.client,
+                         {key: json.dumps(value) for key, value in items.items()}, expire)
+
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """Get a value as raw bytes"""
+        return self._run("get key", None, self.raw_client.get, key)
+
+    def mget_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Get several values as raw bytes in one round trip"""
+        if not keys:
+            return []
+        values = self._run("get keys", None, self.raw_client.mget, keys)
+        return values if values is not None else [None] * len(keys)
+
+    def set_raw(self, key: str, value: bytes, expire: int = 3600, keep_ttl: bool = False) -> bool:
+        """Set a raw bytes value; ``keep_ttl`` rewrites it without touching the existing expiry"""
+        if keep_ttl:
+            return bool(self._run("set key", False, self.raw_client.set, key, value, keepttl=True, xx=True))
+        return bool(self._run("set key", False, self.raw_client.setex, key, expire, value))
+
+    def set_many_raw(self, items: Dict[str, bytes], expire: int = 3600) -> bool:
+        """Set several raw bytes values with expiration in one pipelined round trip"""
+        if not items:
+            return True
+        return self._run("set keys", False, self._pipeline_setex, self.raw_client, items, expire)
+
+    @staticmethod
+    def _pipeline_setex(client, items: Dict[str, Any], expire: int) -> bool:
+        pipe = client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(key, expire, value)
+        return all(pipe.execute())
+
+    def acquire_lock(self, key: str, token: str, ttl_ms: int) -> bool:
+        """Take a short-lived lock (SET NX PX); only the holder's token can release it"""
+        return bool(self._run("acquire lock", False, self.client.set, key, token, nx=True, px=ttl_ms))
+
+    def release_lock(self, key: str, token: str) -> bool:
+        """Release a lock taken with acquire_lock if it is still held by ``token``"""
+        return bool(self._run("release lock", False, self.client.eval, RELEASE_LOCK_SCRIPT, 1, key, token))
+
+    def unlink_matching(self, pattern: str, batch_size: int = 500, pause_s: float = 0.01) -> int:
+        """Delete every key matching ``pattern`` without blocking Redis
+
+        Walks the keyspace with SCAN and removes each page with UNLINK, which
+        frees memory in a background thread, pausing between pages so
+        foreground traffic keeps priority. Returns the number of keys removed.
+        """
+        if not self.connected:
+            return 0
+
+        removed = 0
+        cursor = 0
+        try:
+            while True:
+                cursor, keys = self.client.scan(cursor=cursor, match=pattern, count=batch_size)
+                if keys:
+                    removed += self.client.unlink(*keys)
+                if cursor == 0:
+                    break
+                time.sleep(pause_s)
         except Exception as e:
-            logger.error(f"Failed to get key from Redis: {str(e)}")
-            return None
-    
+            logger.error(f"Failed to delete keys matching {pattern} after {removed} keys: {str(e)}")
+            raise
+        logger.info(f"Deleted {removed} keys matching {pattern}")
+        return removed
+
+    def count_by_prefix(self, pattern: str, depth: int, batch_size: int = 1000) -> Dict[str, int]:
+        """Count keys matching ``pattern`` grouped by their first ``depth`` colon-separated segments"""
+        counts: Dict[str, int] = {}
+        if not self.connected:
+            return counts
+
+        for key in self.client.scan_iter(match=pattern, count=batch_size):
+            prefix = ":".join(key.split(":")[:depth])
+            counts[prefix] = counts.get(prefix, 0) + 1
+        return counts
+
     def delete(self, key: str) -> bool:
         """Delete a key from Redis"""
-        if not self.connected or not self.client:
-            return False
-            
-        try:
-            result = self.client.delete(key)
-            return result > 0
-        except Exception as e:
-            logger.error(f"Failed to delete key from Redis: {str(e)}")
-            return False
-    
+        return self._run("delete key", 0, self.client.delete, key) > 0
+
     def exists(self, key: str) -> bool:
         """Check if a key exists in Redis"""
-        if not self.connected or not self.client:
-            return False
-            
-        try:
-            return self.client.exists(key) > 0
-        except Exception as e:
-            logger.error(f"Failed to check key existence in Redis: {str(e)}")
-            return False
+        return self._run("check key existence", 0, self.client.exists, key) > 0
 
 # Create a singleton instance
-redis_client = RedisClient()
\ No newline at end of file
+redis_client = RedisClient()
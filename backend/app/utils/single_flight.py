@@ -0,0 +1,69 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics; scope is "local" (same process) or "redis" (another process held the lock)
+FORWARDS_SAVED = Counter('prediction_forwards_saved_total', 'Predictions served by waiting on an identical in-flight one', ['scope'])
+SINGLE_FLIGHT_INFLIGHT = Gauge('single_flight_inflight', 'Distinct predictions currently in flight')
+
+
+class FlightAbandoned(Exception):
+    """The leader gave up without a result (e.g. its request was cancelled); waiters should re-join"""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key onto one in-flight computation
+
+    The first caller for a key becomes the leader and must call ``resolve``
+    once it has a result or an error, or ``abandon`` if it stops without
+    one; callers arriving in the meantime get the leader's Future and wait
+    on it instead of computing again. An abandoned flight fails its waiters
+    with FlightAbandoned so they can join again, one of them taking over as
+    leader. Futures are ``concurrent.futures.Future`` so both threads
+    (``result()``) and coroutines (``asyncio.wrap_future``) can wait on them.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.saved = 0
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """Return (future, is_leader) for a key"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.saved += 1
+                FORWARDS_SAVED.labels(scope="local").inc()
+                return future, False
+            future = Future()
+            self._calls[key] = future
+        SINGLE_FLIGHT_INFLIGHT.inc()
+        return future, True
+
+    def resolve(self, key: str, result: Any = None, error: Optional[Exception] = None):
+        """Publish the leader's outcome to every waiter and forget the key"""
+        with self._lock:
+            future = self._calls.pop(key, None)
+        if future is None:
+            return
+        SINGLE_FLIGHT_INFLIGHT.dec()
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def abandon(self, key: str):
+        """Release a flight whose leader stopped without a result; waiters re-join"""
+        self.resolve(key, error=FlightAbandoned(key))
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,98 @@
+import re
+import hashlib
+import unicodedata
+import logging
+
+from prometheus_client import Counter
+
+from app.utils.local_cache import LocalTTLCache
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CANONICAL_CHECKS = Counter(
+    'cache_key_canonical_checks_total',
+    'Fresh predictions compared against an earlier prediction for the same canonical text'
+)
+CANONICAL_DISAGREEMENTS = Counter(
+    'cache_key_canonical_disagreements_total',
+    'Fresh predictions whose label differed from an earlier prediction for the same canonical text'
+)
+
+
+class TextCanonicalizer:
+    """Maps trivially different SMS variants to one canonical form for cache keying
+
+    Spam campaigns reuse a template and vary case, phone numbers, URLs and
+    amounts. The canonical form is only used to build cache keys; the model
+    always sees the original text.
+    """
+
+    URL_PATTERN = re.compile(
+        r"(?:https?://|www\.)\S+|\b[\w-]+(?:\.[\w-]+)*\.(?:com|net|org|info|biz|co\.uk|uk|ly|me)\b(?:/\S*)?",
+        re.IGNORECASE
+    )
+    AMOUNT_PATTERN = re.compile(
+        r"[£$€]\s?\d[\d,]*(?:\.\d+)?|\b\d[\d,]*(?:\.\d+)?\s?(?:p|pence|gbp|usd|eur|pounds|dollars)\b",
+        re.IGNORECASE
+    )
+    PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+    NUMBER_PATTERN = re.compile(r"\d+")
+    WHITESPACE_PATTERN = re.compile(r"\s+")
+
+    def __init__(self, unicode_normalize: bool = True, casefold: bool = True,
+                 mask_urls: bool = True, mask_numbers: bool = True):
+        self.unicode_normalize = unicode_normalize
+        self.casefold = casefold
+        self.mask_urls = mask_urls
+        self.mask_numbers = mask_numbers
+
+    def canonicalize(self, text: str) -> str:
+        """Return the canonical form of an SMS text"""
+        if self.unicode_normalize:
+            text = unicodedata.normalize("NFKC", text)
+        if self.mask_urls:
+            text = self.URL_PATTERN.sub("<url>", text)
+        if self.mask_numbers:
+            # Most specific first so amounts and phone numbers keep distinct masks
+            text = self.AMOUNT_PATTERN.sub("<amount>", text)
+            text = self.PHONE_PATTERN.sub("<phone>", text)
+            text = self.NUMBER_PATTERN.sub("<num>", text)
+        if self.casefold:
+            text = text.casefold()
+        return self.WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+class CanonicalAgreementGuard:
+    """Measures how often canonical-equal texts get different model predictions
+
+    Every fresh (uncached) prediction is recorded under its canonical form.
+    When another text with the same canonical form is later predicted, the
+    two labels are compared. The disagreement ratio is what sharing cache
+    entries across canonical-equal texts would get wrong, so it should be
+    near zero before CACHE_KEY_CANONICALIZATION is switched to "on".
+    """
+
+    def __init__(self, canonicalizer: TextCanonicalizer, max_entries: int = 50000, ttl: float = 86400.0):
+        self.canonicalizer = canonicalizer
+        self._labels = LocalTTLCache(max_entries=max_entries, ttl=ttl, record_metrics=False)
+        self.checks = 0
+        self.disagreements = 0
+
+    def observe(self, text: str, label: str):
+        """Record a fresh prediction and compare it with earlier canonical-equal ones"""
+        canonical = self.canonicalizer.canonicalize(text)
+        key = hashlib.md5(canonical.encode('utf-8')).hexdigest()
+        previous = self._labels.get(key)
+        if previous is not None and previous["text"] != text:
+            self.checks += 1
+            CANONICAL_CHECKS.inc()
+            if previous["label"] != label:
+                self.disagreements += 1
+                CANONICAL_DISAGREEMENTS.inc()
+                logger.warning(f"Canonical-equal texts predicted differently: {previous['text'][:50]!r} vs {text[:50]!r}")
+        self._labels.set(key, {"text": text, "label": label})
+
+    @property
+    def disagreement_rate(self) -> float:
+        return self.disagreements / self.checks if self.checks else 0.0
@@ -0,0 +1,385 @@
+"""
+Dedicated multi-process inference worker pool
+
+Run with ``python -m app.workers.inference_pool``. The pool process listens
+on INFERENCE_POOL_ADDRESS and spawns INFERENCE_POOL_SIZE worker processes,
+each with its torch thread count pinned to INFERENCE_WORKER_TORCH_THREADS.
+API processes (INFERENCE_POOL_ENABLED=true) only load the tokenizer and send
+tokenized chunks over the local IPC connection, so adding uvicorn workers no
+longer multiplies model RAM. Point MERGED_MODEL_PATH at an exported artifact
+so the workers memory-map the same weights file and share its page cache.
+"""
+
+import os
+import time
+import queue
+import signal
+import secrets
+import ipaddress
+import logging
+import threading
+import itertools
+import multiprocessing
+from multiprocessing.connection import Client, Listener
+from typing import List, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIN_AUTHKEY_LENGTH = 16
+WORKER_CHECK_INTERVAL_S = 1.0
+WORKER_RESTART_BACKOFF_S = 1.0
+WORKER_MAX_RESTART_BACKOFF_S = 60.0
+IDLE = -1
+
+
+def parse_address(address: str) -> Union[str, tuple]:
+    """Turn 'host:port' into a TCP address tuple; anything else is a Unix socket path"""
+    if not address.startswith("/") and ":" in address:
+        host, port = address.rsplit(":", 1)
+        return host, int(port)
+    return address
+
+
+def is_loopback(address: Union[str, tuple]) -> bool:
+    """True for Unix socket paths and TCP addresses bound to the loopback interface"""
+    if isinstance(address, str):
+        return True
+    host = address[0]
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def server_authkey(address: Union[str, tuple]) -> bytes:
+    """Resolve the pool's authkey, generating a per-start one when none is configured
+
+    multiprocessing.connection unpickles what it receives, so the key is the
+    only thing keeping other local users (or the network) from running code
+    in the workers. A configured key must be at least MIN_AUTHKEY_LENGTH
+    characters; without one, a random key is written to
+    INFERENCE_POOL_AUTHKEY_FILE (mode 0600) for API processes of the same
+    user to read, and only loopback addresses are allowed.
+    """
+    configured = settings.INFERENCE_POOL_AUTHKEY
+    if configured:
+        if len(configured) < MIN_AUTHKEY_LENGTH:
+            raise ValueError(f"INFERENCE_POOL_AUTHKEY must be at least {MIN_AUTHKEY_LENGTH} characters")
+        return configured.encode()
+    if not is_loopback(address):
+        raise ValueError("Refusing to listen on a non-loopback address without an explicit INFERENCE_POOL_AUTHKEY")
+
+    key = secrets.token_hex(32)
+    path = settings.INFERENCE_POOL_AUTHKEY_FILE
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    logger.info(f"Generated inference pool authkey in {path}")
+    return key.encode()
+
+
+def client_authkey() -> bytes:
+    """The configured authkey, or the one the running pool wrote to INFERENCE_POOL_AUTHKEY_FILE"""
+    if settings.INFERENCE_POOL_AUTHKEY:
+        return settings.INFERENCE_POOL_AUTHKEY.encode()
+    with open(settings.INFERENCE_POOL_AUTHKEY_FILE) as f:
+        return f.read().strip().encode()
+
+
+def _worker_main(worker_id: int, request_queue, result_queue, torch_threads: int, current):
+    """Worker process: load the model once, then run chunks from the shared queue
+
+    ``current`` holds the request id being run (IDLE otherwise) so the pool
+    can fail that request at once if this process dies mid-forward.
+    """
+    import torch
+
+    # Pin intra-op threads so N workers don't oversubscribe the host's cores
+    torch.set_num_threads(torch_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    # Workers run the model in-process; never route back to the pool
+    settings.INFERENCE_POOL_ENABLED = False
+    from app.services.model_service import model_service
+    if not model_service.load_model():
+        logger.error(f"Inference worker {worker_id} failed to load the model")
+        result_queue.put((None, worker_id, "load_failed"))
+        return
+    logger.info(f"Inference worker {worker_id} ready (pid={os.getpid()}, torch_threads={torch_threads})")
+    result_queue.put((None, worker_id, "ready"))
+
+    while True:
+        item = request_queue.get()
+        if item is None:
+            break
+        request_id, encoded_chunk = item
+        current.value = request_id
+        try:
+            result_queue.put((request_id, True, model_service.backend.predict_proba(encoded_chunk)))
+        except Exception as e:
+            logger.error(f"Inference worker {worker_id} failed: {str(e)}")
+            result_queue.put((request_id, False, str(e)))
+        current.value = IDLE
+
+
+class InferencePoolServer:
+    """Accepts IPC connections from API processes and fans requests out to worker processes
+
+    A monitor thread watches the workers: a request held by a worker that
+    dies fails immediately instead of waiting out INFERENCE_POOL_TIMEOUT_S,
+    and the worker is respawned with exponential backoff.
+    """
+
+    def __init__(self, address: str, authkey: bytes, pool_size: int, torch_threads: int):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.pool_size = pool_size
+        self.torch_threads = torch_threads
+        # Spawn so every worker starts clean rather than inheriting torch/OpenMP state
+        self._ctx = multiprocessing.get_context("spawn")
+        self._request_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._workers = []
+        self._current = []
+        self._restarts = []
+        self._next_restart = []
+        self._stopping = threading.Event()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._listener = None
+
+    def _spawn(self, worker_id: int):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._request_queue, self._result_queue, self.torch_threads, self._current[worker_id]),
+            name=f"inference-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def start_workers(self):
+        """Spawn the workers and wait up to INFERENCE_POOL_STARTUP_TIMEOUT_S for all of them to load the model"""
+        if not settings.MERGED_MODEL_PATH:
+            logger.warning("MERGED_MODEL_PATH is not set; each worker will hold a private copy of the model")
+        for worker_id in range(self.pool_size):
+            self._current.append(self._ctx.Value("q", IDLE, lock=False))
+            self._restarts.append(0)
+            self._next_restart.append(0.0)
+            self._workers.append(self._spawn(worker_id))
+
+        ready = set()
+        deadline = time.monotonic() + settings.INFERENCE_POOL_STARTUP_TIMEOUT_S
+        while len(ready) < self.pool_size:
+            try:
+                _, worker_id, status = self._result_queue.get(timeout=WORKER_CHECK_INTERVAL_S)
+            except queue.Empty:
+                for worker_id, process in enumerate(self._workers):
+                    if worker_id not in ready and not process.is_alive():
+                        raise RuntimeError(f"Inference worker {worker_id} exited with code {process.exitcode} before it was ready")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Inference workers not ready after {settings.INFERENCE_POOL_STARTUP_TIMEOUT_S}s")
+                continue
+            if status != "ready":
+                raise RuntimeError(f"Inference worker {worker_id} failed to start")
+            ready.add(worker_id)
+        logger.info(f"{len(ready)} inference workers ready")
+
+    def _dispatch_results(self):
+        """Route worker results back to the connection thread waiting on them"""
+        while True:
+            request_id, ok, payload = self._result_queue.get()
+            if request_id is None:
+                # Status report from a respawned worker
+                worker_id, status = ok, payload
+                if status == "ready":
+                    self._restarts[worker_id] = 0
+                    logger.info(f"Inference worker {worker_id} ready again")
+                else:
+                    logger.error(f"Respawned inference worker {worker_id} failed to load the model")
+                continue
+            self._complete(request_id, ok, payload)
+
+    def _complete(self, request_id: int, ok: bool, payload):
+        with self._pending_lock:
+            waiter = self._pending.pop(request_id, None)
+        if waiter is not None:
+            event, slot = waiter
+            slot.append((ok, payload))
+            event.set()
+
+    def _monitor_workers(self):
+        """Fail the request a dead worker was running and respawn it, backing off if it keeps dying"""
+        while not self._stopping.wait(WORKER_CHECK_INTERVAL_S):
+            for worker_id, process in enumerate(self._workers):
+                if process.is_alive():
+                    continue
+                request_id = self._current[worker_id].value
+                if request_id != IDLE:
+                    self._current[worker_id].value = IDLE
+                    self._complete(request_id, False, f"Inference worker {worker_id} died (exit code {process.exitcode})")
+                now = time.monotonic()
+                if now < self._next_restart[worker_id]:
+                    continue
+                backoff = min(WORKER_RESTART_BACKOFF_S * 2 ** self._restarts[worker_id], WORKER_MAX_RESTART_BACKOFF_S)
+                self._restarts[worker_id] += 1
+                self._next_restart[worker_id] = now + backoff
+                logger.error(f"Inference worker {worker_id} exited with code {process.exitcode}; respawning")
+                self._workers[worker_id] = self._spawn(worker_id)
+
+    def _submit(self, encoded_chunk: dict) -> List[List[float]]:
+        request_id = next(self._request_ids)
+        event, slot = threading.Event(), []
+        with self._pending_lock:
+            self._pending[request_id] = (event, slot)
+        self._request_queue.put((request_id, encoded_chunk))
+        if not event.wait(settings.INFERENCE_POOL_TIMEOUT_S):
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise TimeoutError(f"No inference worker answered within {settings.INFERENCE_POOL_TIMEOUT_S}s")
+        ok, payload = slot[0]
+        if not ok:
+            raise RuntimeError(payload)
+        return payload
+
+    def _serve_connection(self, conn):
+        try:
+            while True:
+                try:
+                    command, payload = conn.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    if command == "ping":
+                        conn.send((True, self.pool_size))
+                    elif command == "predict_proba":
+                        conn.send((True, self._submit(payload)))
+                    else:
+                        conn.send((False, f"Unknown command: {command}"))
+                except Exception as e:
+                    conn.send((False, str(e)))
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.start_workers()
+        threading.Thread(target=self._dispatch_results, name="result-dispatcher", daemon=True).start()
+        threading.Thread(target=self._monitor_workers, name="worker-monitor", daemon=True).start()
+
+        self._listener = Listener(self.address, authkey=self.authkey)
+        if isinstance(self.address, str):
+            # Only processes of the same user may connect to the Unix socket
+            os.chmod(self.address, 0o600)
+        logger.info(f"Inference pool listening on {self.address}")
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break
+            except Exception as e:
+                logger.warning(f"Rejected inference pool connection: {str(e)}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def shutdown(self):
+        self._stopping.set()
+        for _ in self._workers:
+            self._request_queue.put(None)
+        for process in self._workers:
+            process.join(timeout=10)
+        if self._listener is not None:
+            self._listener.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        logger.info("Inference pool shut down")
+
+
+class InferencePoolClient:
+    """Client side of the pool, used by API processes
+
+    Connections are not thread-safe, so each calling thread keeps its own
+    and reconnects if the pool restarts.
+    """
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, command: str, payload=None):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((command, payload))
+                ok, result = conn.recv()
+                break
+            except (EOFError, OSError):
+                # Stale connection (pool restarted); retry once on a fresh one
+                self._local.conn = None
+                if attempt:
+                    raise
+        if not ok:
+            raise RuntimeError(f"Inference pool error: {result}")
+        return result
+
+    def ping(self) -> int:
+        """Return the number of workers in the pool"""
+        return self._call("ping")
+
+    def predict_proba(self, encoded_chunk: dict) -> List[List[float]]:
+        return self._call("predict_proba", {key: list(values) for key, values in encoded_chunk.items()})
+
+
+class RemotePoolBackend:
+    """Inference backend that runs chunks on the worker pool instead of in-process"""
+
+    name = "pool"
+
+    def __init__(self, client: InferencePoolClient):
+        self.client = client
+
+    def predict_proba(self, encoded_chunk: dict) -> List[List[float]]:
+        return self.client.predict_proba(encoded_chunk)
+
+
+def main():
+    from app.core.logging import setup_logging
+    setup_logging()
+
+    server = InferencePoolServer(
+        settings.INFERENCE_POOL_ADDRESS,
+        server_authkey(parse_address(settings.INFERENCE_POOL_ADDRESS)),
+        pool_size=settings.INFERENCE_POOL_SIZE,
+        torch_threads=settings.INFERENCE_WORKER_TORCH_THREADS
+    )
+
+    def _handle_signal(signum, frame):
+        server.shutdown()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark the cascade against the fine-tuned model alone
+
+Runs the test split through TinyLlama only, then through the cascade at
+each confidence level (first stage answers spam >= c and spam <= 1 - c)
+and at the configured thresholds. Reports escalation rate, accuracy delta,
+agreement with the model-only predictions and throughput gain.
+"""
+
+import os
+import sys
+import argparse
+
+from sms_eval import BACKEND_DIR, evaluate, load_labelled_sms, print_table
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cheap-model cascade")
+    parser.add_argument("--csv", help="Labelled SMS CSV with 'label' and 'sms' columns (default: SMS Spam Collection test split)")
+    parser.add_argument("--limit", type=int, help="Number of messages to evaluate (default: whole split)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--cascade-model", help="First-stage weights (default: CASCADE_MODEL_PATH)")
+    parser.add_argument("--confidence", default="0.9,0.95,0.98,0.99",
+                        help="Comma-separated symmetric confidence levels to sweep")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    from app.core.config import settings
+    from app.services.model_service import model_service
+
+    texts, labels = load_labelled_sms(args.csv, args.limit)
+    settings.CASCADE_ENABLED = False
+    if not model_service.load_model():
+        print("❌ Model failed to load")
+        return 1
+    if not model_service._load_cascade(args.cascade_model or settings.CASCADE_MODEL_PATH):
+        print("❌ Cascade model failed to load")
+        return 1
+    # Bypass the prediction cache so every text runs through the model
+    model_service.disable_caching()
+    router = model_service.cascade
+
+    model_service.cascade = None
+    baseline = evaluate(model_service.predict_many, texts, labels, batch_size=args.batch_size)
+    baseline["config"] = "model_only"
+    baseline["escalation_rate"] = 1.0
+    rows = [baseline]
+
+    levels = [(c, 1.0 - c) for c in (float(v) for v in args.confidence.split(",") if v)]
+    levels.append((settings.CASCADE_SPAM_THRESHOLD, settings.CASCADE_HAM_THRESHOLD))
+    first_stage_probs = router.classifier.predict_proba(texts)
+    model_service.cascade = router
+    for spam_threshold, ham_threshold in levels:
+        router.spam_threshold, router.ham_threshold = spam_threshold, ham_threshold
+        metrics = evaluate(model_service.predict_many, texts, labels, batch_size=args.batch_size)
+        escalated = sum(1 for p in first_stage_probs if ham_threshold < p < spam_threshold)
+        metrics["config"] = f"cascade_{ham_threshold:g}_{spam_threshold:g}"
+        metrics["escalation_rate"] = escalated / len(texts)
+        rows.append(metrics)
+
+    for row in rows:
+        row["accuracy_delta"] = f"{row['accuracy'] - baseline['accuracy']:+.4f}"
+        row["agreement"] = f"{sum(int(a == b) for a, b in zip(row['predictions'], baseline['predictions'])) / len(texts):.4f}"
+        row["throughput_gain"] = f"{row['throughput_per_s'] / baseline['throughput_per_s']:.2f}x" if baseline["throughput_per_s"] else "-"
+    for row in rows:
+        row["accuracy"] = f"{row['accuracy']:.4f}"
+        row["escalation_rate"] = f"{row['escalation_rate']:.3f}"
+        for key in ("latency_p50_ms", "latency_p95_ms", "throughput_per_s"):
+            row[key] = f"{row[key]:.1f}"
+    print_table(rows, ["config", "samples", "escalation_rate", "accuracy", "accuracy_delta", "agreement",
+                       "latency_p95_ms", "throughput_per_s", "throughput_gain"])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
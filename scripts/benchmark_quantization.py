@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Script to compare full-precision and dynamic int8 inference side by side
+
+Each quantization mode is loaded in a fresh process so memory numbers are not
+polluted by the previous run. Reports accuracy on a labelled SMS sample,
+latency, throughput and resident memory, and exits non-zero if int8 accuracy
+drops more than --max-accuracy-drop below full precision.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from sms_eval import BACKEND_DIR, current_rss_mb, evaluate, load_labelled_sms, print_table
+
+MODES = ["none", "dynamic_int8"]
+
+def run_mode(mode: str, args) -> dict:
+    """Load the model with one quantization mode and evaluate it (runs in a child process)"""
+    os.chdir(BACKEND_DIR)
+    from app.core.config import settings
+    from app.services.model_service import model_service
+
+    settings.INFERENCE_QUANTIZATION = mode
+    if mode != "none":
+        settings.INFERENCE_MODE = "merged"
+
+    texts, labels = load_labelled_sms(args.csv, args.limit)
+    rss_before = current_rss_mb()
+    if not model_service.load_model():
+        return {"mode": mode, "error": "model failed to load"}
+    rss_loaded = current_rss_mb()
+
+    # Bypass the prediction cache so every text runs through the model
+    model_service.disable_caching()
+    metrics = evaluate(model_service.predict_many, texts, labels, batch_size=args.batch_size)
+    metrics.update({
+        "mode": model_service.quantization,
+        "model_rss_mb": rss_loaded - rss_before,
+        "peak_rss_mb": current_rss_mb(),
+    })
+    return metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dynamic int8 quantization against full precision")
+    parser.add_argument("--csv", help="Labelled SMS CSV with 'label' and 'sms' columns (default: SMS Spam Collection test split)")
+    parser.add_argument("--limit", type=int, default=500, help="Number of messages to evaluate")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.005)
+    parser.add_argument("--run-mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        print(json.dumps(run_mode(args.run_mode, args)))
+        return 0
+
+    rows = []
+    for mode in MODES:
+        child_args = [sys.executable, os.path.abspath(__file__), "--run-mode", mode,
+                      "--limit", str(args.limit), "--batch-size", str(args.batch_size)]
+        if args.csv:
+            child_args += ["--csv", os.path.abspath(args.csv)]
+        output = subprocess.run(child_args, capture_output=True, text=True, check=True).stdout
+        rows.append(json.loads(output.strip().splitlines()[-1]))
+
+    if any("error" in row for row in rows):
+        print(json.dumps(rows, indent=2))
+        return 1
+
+    baseline, quantized = rows
+    agreement = sum(int(a == b) for a, b in zip(baseline["predictions"], quantized["predictions"])) / baseline["samples"]
+    for row in rows:
+        row["accuracy"] = f"{row['accuracy']:.4f}"
+        for key in ("latency_p50_ms", "latency_p95_ms", "throughput_per_s", "model_rss_mb", "peak_rss_mb"):
+            row[key] = f"{row[key]:.1f}"
+    print_table(rows, ["mode", "samples", "accuracy", "latency_p50_ms", "latency_p95_ms",
+                       "throughput_per_s", "model_rss_mb", "peak_rss_mb"])
+    print(f"\nPrediction agreement with full precision: {agreement:.4f}")
+
+    accuracy_drop = float(baseline["accuracy"]) - float(quantized["accuracy"])
+    if accuracy_drop > args.max_accuracy_drop:
+        print(f"❌ int8 accuracy dropped by {accuracy_drop:.4f} (max {args.max_accuracy_drop})")
+        return 1
+    print(f"✅ int8 accuracy within {args.max_accuracy_drop} of full precision")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
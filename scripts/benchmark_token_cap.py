@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Script to derive the inference token cap and measure the pooled-head fast path
+
+Prints the token-length distribution of the SMS Spam Collection test split
+with a suggested INFERENCE_MAX_TOKENS, then compares the original path
+(512-token cap, score head over every position) with the pooled-head path
+at the chosen cap: accuracy, prediction agreement, latency and throughput.
+"""
+
+import os
+import sys
+import math
+import argparse
+
+from sms_eval import BACKEND_DIR, evaluate, load_labelled_sms, percentile, print_table
+
+def suggest_cap(lengths, coverage: float) -> int:
+    """Smallest multiple of 32 covering the given percentile of messages"""
+    return int(math.ceil(percentile(lengths, coverage) / 32) * 32)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token cap and pooled score head")
+    parser.add_argument("--csv", help="Labelled SMS CSV with 'label' and 'sms' columns (default: SMS Spam Collection test split)")
+    parser.add_argument("--limit", type=int, help="Number of messages to evaluate (default: whole split)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--coverage", type=float, default=99.9, help="Percentile of message lengths the cap must cover")
+    parser.add_argument("--max-tokens", type=int, help="Cap to benchmark (default: derived from the data)")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    from app.core.config import settings
+    from app.services.model_service import model_service
+
+    texts, labels = load_labelled_sms(args.csv, args.limit)
+    if not model_service.load_model():
+        print("❌ Model failed to load")
+        return 1
+    # Bypass the prediction cache so every text runs through the model
+    model_service.disable_caching()
+
+    lengths = [len(ids) for ids in model_service.tokenizer(texts, truncation=False)["input_ids"]]
+    print("Token lengths: " + ", ".join(
+        f"p{p}={percentile(lengths, p):.0f}" for p in (50, 90, 95, 99, 99.9)
+    ) + f", max={max(lengths)}")
+    cap = args.max_tokens or suggest_cap(lengths, args.coverage)
+    truncated = sum(1 for length in lengths if length > cap)
+    print(f"Token cap: {cap} ({truncated} of {len(lengths)} messages truncated)\n")
+
+    backend = model_service.backend
+    rows = []
+    for name, max_tokens, pooled in (("full_head_512", 512, False), (f"pooled_head_{cap}", cap, True)):
+        settings.INFERENCE_MAX_TOKENS = max_tokens
+        if hasattr(backend, "pooled_head"):
+            backend.pooled_head = pooled
+        metrics = evaluate(model_service.predict_many, texts, labels, batch_size=args.batch_size)
+        metrics["config"] = name
+        rows.append(metrics)
+
+    baseline, fast = rows
+    agreement = sum(int(a == b) for a, b in zip(baseline["predictions"], fast["predictions"])) / baseline["samples"]
+    speedup = fast["throughput_per_s"] / baseline["throughput_per_s"] if baseline["throughput_per_s"] else 0.0
+    for row in rows:
+        row["accuracy"] = f"{row['accuracy']:.4f}"
+        for key in ("latency_p50_ms", "latency_p95_ms", "throughput_per_s"):
+            row[key] = f"{row[key]:.1f}"
+    print_table(rows, ["config", "samples", "accuracy", "latency_p50_ms", "latency_p95_ms", "throughput_per_s"])
+    print(f"\nPrediction agreement: {agreement:.4f}")
+    print(f"Throughput gain: {speedup:.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Script to check whether canonical cache keys are safe to enable
+
+Groups labelled SMS messages by their canonical form (the key used when
+CACHE_KEY_CANONICALIZATION=on), runs the model on every message and reports
+the projected cache hit rate with raw vs canonical keys and how often
+canonical-equal messages get different predictions. Exits non-zero if the
+disagreement rate exceeds --max-disagreement.
+"""
+
+import os
+import sys
+import argparse
+from collections import defaultdict
+
+from sms_eval import BACKEND_DIR, load_labelled_sms
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prediction agreement across canonical-equal SMS texts")
+    parser.add_argument("--csv", help="Labelled SMS CSV with 'label' and 'sms' columns (default: whole SMS Spam Collection)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-disagreement", type=float, default=0.001)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    from app.services.model_service import model_service
+
+    texts, labels = load_labelled_sms(args.csv, args.limit, split="all")
+    canonical_texts = [model_service.canonicalizer.canonicalize(text) for text in texts]
+
+    raw_unique = len(set(texts))
+    canonical_unique = len(set(canonical_texts))
+    print(f"Messages: {len(texts)}")
+    print(f"Projected hit rate with raw keys:       {1 - raw_unique / len(texts):.4f}")
+    print(f"Projected hit rate with canonical keys: {1 - canonical_unique / len(texts):.4f}")
+
+    groups = defaultdict(set)
+    for text, canonical in zip(texts, canonical_texts):
+        groups[canonical].add(text)
+    shared = {canonical: sorted(members) for canonical, members in groups.items() if len(members) > 1}
+    print(f"Canonical keys shared by different texts: {len(shared)}")
+    if not shared:
+        print("✅ No canonical collisions to check")
+        return 0
+
+    if not model_service.load_model():
+        print("❌ Model failed to load")
+        return 1
+    # Bypass the prediction cache so every text runs through the model
+    model_service.disable_caching()
+
+    label_of = dict(zip(texts, labels))
+    member_texts = [text for members in shared.values() for text in members]
+    predictions = {}
+    for start in range(0, len(member_texts), args.batch_size):
+        batch = member_texts[start:start + args.batch_size]
+        for text, result in zip(batch, model_service.predict_many(batch)):
+            predictions[text] = result["prediction"]
+
+    disagreeing = []
+    for canonical, members in shared.items():
+        if len({predictions[text] for text in members}) > 1:
+            disagreeing.append((canonical, members))
+    label_conflicts = sum(1 for members in shared.values() if len({label_of[text] for text in members}) > 1)
+
+    rate = len(disagreeing) / len(shared)
+    print(f"Shared keys with conflicting predictions: {len(disagreeing)} ({rate:.4f})")
+    print(f"Shared keys with conflicting ground-truth labels: {label_conflicts}")
+    for canonical, members in disagreeing[:10]:
+        print(f"\n  {canonical[:80]!r}")
+        for text in members[:3]:
+            print(f"    {predictions[text]:>8}  {text[:70]!r}")
+
+    if rate > args.max_disagreement:
+        print(f"\n❌ Disagreement rate {rate:.4f} exceeds {args.max_disagreement}; keep canonicalisation off or in shadow mode")
+        return 1
+    print(f"\n✅ Disagreement rate within {args.max_disagreement}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Script to export the fine-tuned model as a single merged safetensors artifact
+
+The LoRA adapters and trained classification head are folded into the base
+weights, and the result is written with its tokenizer to one directory. Point
+MERGED_MODEL_PATH at that directory so the backend and Celery workers
+memory-map the weights at startup instead of rebuilding the PEFT model.
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+# Run from the backend directory so the app package and relative adapter path resolve
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def export_merged_model(output_dir: str):
+    """Load the PEFT model in merged mode and write it out as an inference-ready artifact"""
+    from app.core.config import settings
+    from app.services.model_service import model_service
+    from app.utils.model_artifacts import export_merged_model as write_artifact
+
+    # Always rebuild from the adapters rather than re-exporting an existing artifact
+    settings.MERGED_MODEL_PATH = None
+    # Export needs the torch model in this process, not an ORT session or the worker pool
+    settings.INFERENCE_BACKEND = "torch"
+    settings.INFERENCE_POOL_ENABLED = False
+    settings.INFERENCE_MODE = "merged"
+    settings.INFERENCE_QUANTIZATION = "none"
+
+    if not model_service.load_model():
+        logger.error("Model could not be loaded")
+        return False
+    if model_service.inference_mode != "merged":
+        logger.error("Adapters were not merged (parity check failed); refusing to export")
+        return False
+
+    model = model_service.model.to("cpu")
+    model.config.pad_token_id = model_service.tokenizer.pad_token_id
+    write_artifact(model, model_service.tokenizer, output_dir)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a merged TinyLlama SMS spam model")
+    parser.add_argument("--output-dir", default="../merged_tinyllama_sms_spam_model",
+                        help="Directory to write the artifact to (relative to backend/)")
+    args = parser.parse_args()
+
+    success = export_merged_model(args.output_dir)
+    if success:
+        print("Merged model export completed successfully!")
+    else:
+        print("Merged model export failed!")
+        sys.exit(1)
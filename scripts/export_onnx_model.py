@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script to export the merged TinyLlama classifier to ONNX
+
+Loads the model the same way the backend does (pre-merged artifact if
+MERGED_MODEL_PATH is set, otherwise PEFT adapters merged at load time) and
+writes model.onnx plus tokenizer. Point ONNX_MODEL_PATH at the output
+directory and set INFERENCE_BACKEND=onnx to serve it through ONNX Runtime.
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+# Run from the backend directory so the app package and relative adapter path resolve
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def export_onnx_model(output_dir: str, opset: int):
+    """Load the merged PyTorch model and export it to ONNX"""
+    from app.core.config import settings
+    from app.services.model_service import model_service
+    from app.services.inference_backends import export_onnx
+
+    settings.INFERENCE_BACKEND = "torch"
+    settings.INFERENCE_MODE = "merged"
+    settings.INFERENCE_QUANTIZATION = "none"
+
+    if not model_service.load_model():
+        logger.error("Model could not be loaded")
+        return False
+    if model_service.inference_mode != "merged":
+        logger.error("Adapters were not merged (parity check failed); refusing to export")
+        return False
+
+    export_onnx(model_service.model, model_service.tokenizer, output_dir, opset=opset)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the merged TinyLlama SMS spam model to ONNX")
+    parser.add_argument("--output-dir", default="../onnx_tinyllama_sms_spam_model",
+                        help="Directory to write the ONNX model to (relative to backend/)")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    success = export_onnx_model(args.output_dir, args.opset)
+    if success:
+        print("ONNX export completed successfully!")
+    else:
+        print("ONNX export failed!")
+        sys.exit(1)
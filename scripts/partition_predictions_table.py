@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Script to migrate an existing predictions table to daily partitions
+
+Tables created before partitioning are plain heap tables, and create_all
+never alters an existing table. This renames the old table, creates the
+partitioned one with partitions covering every day that has data plus the
+days ahead, copies the rows across in one transaction and backfills the
+hourly rollup. The old table is kept as predictions_unpartitioned unless
+--drop-old is passed.
+
+    python scripts/partition_predictions_table.py
+    python scripts/partition_predictions_table.py --drop-old
+"""
+
+import os
+import sys
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+logging.basicConfig(level=logging.INFO)
+
+OLD_TABLE = "predictions_unpartitioned"
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the predictions table to daily range partitions")
+    parser.add_argument("--drop-old", action="store_true", help=f"Drop {OLD_TABLE} after copying")
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from app.core.database import Base, engine
+    from app.models.prediction import Prediction
+    from app.services.partition_service import TABLE, is_partitioned, partition_service
+
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT to_regclass(:table)"), {"table": TABLE}).scalar() is None:
+            print(f"ℹ️ No {TABLE} table yet; the API creates it partitioned on startup")
+            return 0
+        if is_partitioned(conn):
+            print(f"✅ {TABLE} is already partitioned")
+            return 0
+
+        # Free the table, primary key and index names for the partitioned table
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}"))
+        conn.execute(text(f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {OLD_TABLE}_pkey"))
+        for index in Prediction.__table__.indexes:
+            conn.execute(text(f"ALTER INDEX IF EXISTS {index.name} RENAME TO {index.name}_unpartitioned"))
+        Base.metadata.create_all(bind=conn)
+
+        first, last = conn.execute(text(f"SELECT min(timestamp), max(timestamp) FROM {OLD_TABLE}")).one()
+        today = datetime.now().date()
+        first_day = first.date() if first else today
+        last_day = max(last.date() if last else today, today + timedelta(days=partition_service.days_ahead))
+        created = partition_service.create_partitions(conn, first_day, last_day)
+        print(f"📦 Created {len(created)} daily partitions ({first_day} to {last_day})")
+
+        copied = conn.execute(text(
+            f"INSERT INTO {TABLE} (id, sms_text, prediction, confidence, timestamp, model_version) "
+            f"SELECT id, sms_text, prediction, confidence, timestamp, model_version FROM {OLD_TABLE}"
+        )).rowcount
+        print(f"📋 Copied {copied} predictions")
+
+        if first:
+            rollup_rows = partition_service.upsert_rollup(
+                conn, datetime.combine(first_day, datetime.min.time()), datetime.now() + timedelta(hours=1))
+            print(f"📊 Backfilled {rollup_rows} hourly rollup rows")
+
+        if args.drop_old:
+            conn.execute(text(f"DROP TABLE {OLD_TABLE}"))
+            print(f"🗑️ Dropped {OLD_TABLE}")
+
+        # Refresh planner row estimates so /history totals cover the new partitions
+        conn.execute(text(f"ANALYZE {TABLE}"))
+
+    note = "" if args.drop_old else f"; {OLD_TABLE} can be dropped once verified"
+    print(f"✅ {TABLE} is now partitioned by day{note}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script to list and retire prediction cache namespaces
+
+Prediction cache keys are namespaced by model version. After a model update
+the previous namespace is never read again; this removes it incrementally
+with SCAN/UNLINK instead of waiting for the TTL or flushing Redis.
+
+    python scripts/retire_cache_namespace.py --list
+    python scripts/retire_cache_namespace.py <old model version>
+    python scripts/retire_cache_namespace.py legacy   # keys written before namespacing
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+logging.basicConfig(level=logging.INFO)
+
+def main():
+    parser = argparse.ArgumentParser(description="Retire a model version's prediction cache namespace")
+    parser.add_argument("version", nargs="?", help="Model version to retire, or 'legacy'")
+    parser.add_argument("--list", action="store_true", help="Count cached predictions per namespace")
+    parser.add_argument("--batch-size", type=int, default=500, help="Keys per SCAN/UNLINK round")
+    args = parser.parse_args()
+
+    from app.services.model_service import CACHE_KEY_PREFIX, model_service
+
+    redis_client = model_service.redis_client
+    if not (redis_client and redis_client.connected):
+        print("❌ Redis is not connected")
+        return 1
+
+    if args.list or not args.version:
+        counts = redis_client.count_by_prefix(f"{CACHE_KEY_PREFIX}:*", depth=2)
+        legacy = sum(count for prefix, count in counts.items() if len(prefix.split(":")[1]) == 32)
+        for prefix, count in sorted(counts.items()):
+            if len(prefix.split(":")[1]) != 32:
+                print(f"{prefix.split(':')[1]:<16} {count}")
+        if legacy:
+            print(f"{'legacy':<16} {legacy}")
+        return 0
+
+    # retire_cache_namespace refuses the live namespace, derived from MODEL_VERSION or the artifact fingerprint
+    print(f"ℹ️ Live namespace: {model_service.live_model_version()}")
+    try:
+        removed = model_service.retire_cache_namespace(args.version, batch_size=args.batch_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Removed {removed} cached predictions for {args.version}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
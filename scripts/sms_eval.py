@@ -0,0 +1,99 @@
+"""
+Shared helpers for the inference benchmark scripts
+
+Loads a labelled SMS sample and measures accuracy, latency and memory of
+the backend's ModelService, so every inference mode is judged on the same data.
+"""
+
+import os
+import sys
+import csv
+import time
+import resource
+from typing import List, Optional, Tuple
+
+# Run from the backend directory so the app package and relative adapter path resolve
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+def load_labelled_sms(csv_path: Optional[str] = None, limit: Optional[int] = None,
+                      split: str = "test") -> Tuple[List[str], List[int]]:
+    """Load labelled SMS texts (1 = spam, 0 = ham)
+
+    With ``csv_path`` the file must have ``label`` (spam/ham or 1/0) and
+    ``sms`` columns. Otherwise the SMS Spam Collection test split used during
+    fine-tuning is rebuilt (80/20 split, seed 42); ``split="train"`` returns the
+    training side of that split and ``split="all"`` the whole collection.
+    """
+    texts, labels = [], []
+    if csv_path:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                label = row["label"].strip().lower()
+                texts.append(row["sms"])
+                labels.append(1 if label in ("spam", "1") else 0)
+    else:
+        from datasets import load_dataset
+        dataset = load_dataset("sms_spam")
+        data = dataset["train"]
+        if split in ("train", "test"):
+            data = data.train_test_split(test_size=0.2, seed=42)[split]
+        texts = list(data["sms"])
+        labels = list(data["label"])
+
+    if limit:
+        texts, labels = texts[:limit], labels[:limit]
+    return texts, labels
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fall back to peak RSS where /proc is unavailable
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def evaluate(predict_fn, texts: List[str], labels: List[int], batch_size: int = 1) -> dict:
+    """Run texts through ``predict_fn`` (list of texts -> list of result dicts)
+
+    Returns accuracy, per-batch latency percentiles and throughput.
+    """
+    latencies = []
+    predictions = []
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        t0 = time.perf_counter()
+        results = predict_fn(batch)
+        latencies.append(time.perf_counter() - t0)
+        predictions.extend(1 if r["prediction"] == "spam" else 0 for r in results)
+    elapsed = time.perf_counter() - started
+
+    correct = sum(int(p == y) for p, y in zip(predictions, labels))
+    return {
+        "samples": len(texts),
+        "accuracy": correct / len(texts) if texts else 0.0,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p95_ms": percentile(latencies, 95) * 1000,
+        "throughput_per_s": len(texts) / elapsed if elapsed else 0.0,
+        "predictions": predictions,
+    }
+
+def print_table(rows: List[dict], columns: List[str]):
+    """Print benchmark rows side by side"""
+    widths = [max(len(col), *(len(f"{row.get(col, '')}") for row in rows)) for col in columns]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(f"{row.get(col, '')}".ljust(w) for col, w in zip(columns, widths)))
@@ -0,0 +1,12 @@
+@echo off
+title Celery Beat for SMS Spam Detection
+
+echo Starting Celery beat...
+
+REM Change to backend directory
+cd ../backend
+
+REM Start Celery beat
+celery -A app.core.celery_app beat --loglevel=info
+
+pause
\ No newline at end of file
@@ -0,0 +1,10 @@
+#!/bin/bash
+# Start Celery beat for periodic tasks (partition maintenance)
+
+echo "Starting Celery beat..."
+
+# Change to backend directory
+cd backend
+
+# Start Celery beat
+celery -A app.core.celery_app beat --loglevel=info
\ No newline at end of file
@@ -0,0 +1,12 @@
+@echo off
+title Inference Worker Pool for SMS Spam Detection
+
+echo Starting inference worker pool...
+
+REM Change to backend directory
+cd ../backend
+
+REM Start the pool (API processes connect with INFERENCE_POOL_ENABLED=true)
+python -m app.workers.inference_pool
+
+pause
\ No newline at end of file
@@ -0,0 +1,10 @@
+#!/bin/bash
+# Start the dedicated inference worker pool
+
+echo "Starting inference worker pool..."
+
+# Change to backend directory
+cd backend
+
+# Start the pool (API processes connect with INFERENCE_POOL_ENABLED=true)
+python -m app.workers.inference_pool
\ No newline at end of file
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Script to train the cascade's first-stage classifier
+
+Fits hashed n-gram logistic regression on the training side of the split
+used to fine-tune TinyLlama (so the test split stays unseen), reports its
+accuracy on the test split and writes the weights for CASCADE_MODEL_PATH.
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+from sms_eval import BACKEND_DIR, load_labelled_sms
+
+logging.basicConfig(level=logging.INFO)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram cascade classifier")
+    parser.add_argument("--csv", help="Labelled SMS CSV with 'label' and 'sms' columns (default: SMS Spam Collection train split)")
+    parser.add_argument("--output", default="../cascade_sms_spam_model.npz",
+                        help="Where to write the weights (relative to backend/)")
+    parser.add_argument("--num-features", type=int, default=1 << 18)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    from app.services.cascade_classifier import HashedNgramClassifier
+
+    texts, labels = load_labelled_sms(args.csv, split="train")
+    classifier = HashedNgramClassifier(num_features=args.num_features)
+    classifier.fit(texts, labels, epochs=args.epochs, learning_rate=args.learning_rate, l2=args.l2)
+
+    if not args.csv:
+        test_texts, test_labels = load_labelled_sms(split="test")
+        probs = classifier.predict_proba(test_texts)
+        accuracy = sum(int((p >= 0.5) == bool(y)) for p, y in zip(probs, test_labels)) / len(test_labels)
+        print(f"Test accuracy at 0.5: {accuracy:.4f} ({len(test_labels)} messages)")
+
+    classifier.save(args.output)
+    print(f"Cascade model written to {args.output}; set CASCADE_MODEL_PATH to enable it")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())